@@ -1,11 +1,334 @@
 import matplotlib.pyplot as plt
 import numpy as np
+import os
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+
+# 可选依赖：pydivsufsort提供C实现的后缀数组构建，用于加速重复序列查找
+# 如果未安装则回退到纯Python的暴力扫描实现
+try:
+    from pydivsufsort import divsufsort, kasai
+except ImportError:
+    divsufsort = None
+    kasai = None
+
+# 可选依赖：pyahocorasick提供C实现的多模式匹配自动机，
+# 用一次线性扫描代替对每个候选子串的单独查找
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# 碱基互补映射表，str.translate在C层一次完成整条序列的互补转换
+_RC_TABLE = str.maketrans('ACGTacgtN', 'TGCAtgcaN')
 
 def reverse_complement(sequence):
     """生成DNA序列的反向互补序列"""
-    complement = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
-    return ''.join(complement.get(base, base) for base in reversed(sequence))
+    return sequence.translate(_RC_TABLE)[::-1]
+
+def _collect_repeats_suffix_array(reference, query, is_reversed, min_length, max_length, accepted_hashes, results):
+    """利用后缀数组+LCP数组枚举满足条件的重复序列
+
+    在reference + '#' + query的拼接串上构建后缀数组，
+    通过LCP区间（增强后缀数组）枚举所有不同的子串及其出现位置集合，
+    只输出在reference中仅出现一次、在query中出现至少两次的子串。
+
+    参数:
+        reference: 参考序列
+        query: 查询序列（正向或反向互补后的序列）
+        is_reversed: 是否为反向互补匹配
+        min_length: 最小子序列长度
+        max_length: 最大子序列长度
+        accepted_hashes: 已接受序列的滚动哈希指纹集合，避免重复输出
+        results: 结果列表，元素为(结果字典, ref位置)元组
+    """
+    ref_len = len(reference)
+    text = (reference + '#' + query).encode('ascii')
+    n = len(text)
+
+    # 构建后缀数组和LCP数组（lcp[i]为SA[i]与SA[i+1]的最长公共前缀长度）
+    sa = divsufsort(text)
+    lcp = kasai(text, sa)
+
+    # 前缀和：统计SA前i个后缀中有多少个起点落在reference区域
+    is_ref = (sa < ref_len).astype(np.int64)
+    ref_prefix = np.concatenate(([0], np.cumsum(is_ref)))
+
+    def emit_interval(depth, lb, rb, parent_depth):
+        # LCP区间[lb, rb]对应一组出现位置相同的子串，长度范围为(parent_depth, depth]
+        ref_count = ref_prefix[rb + 1] - ref_prefix[lb]
+        total = rb - lb + 1
+        query_count = total - ref_count
+
+        # 只有当序列在reference中仅出现一次，但在query中出现多次时，才认为是重复序列
+        if ref_count != 1 or query_count < 2:
+            return
+
+        # 长度范围受min_length/max_length约束，且忽略单个碱基
+        lo = max(parent_depth + 1, min_length, 2)
+        hi = min(depth, max_length)
+        if lo > hi:
+            return
+
+        # 提取区间内的位置：reference中的唯一位置和query中的所有位置
+        interval = sa[lb:rb + 1]
+        ref_pos = int(interval[is_ref[lb:rb + 1] == 1][0])
+        positions = sorted(int(p) - ref_len - 1 for p in interval if p > ref_len)
+
+        # 滚动多项式哈希：长度每增加1只需一次乘加，
+        # 以64位整数指纹代替字符串切片+逐字符哈希做去重
+        h = 0
+        for pos in range(ref_pos, ref_pos + lo - 1):
+            h = (h * 131 + ord(reference[pos])) & 0xFFFFFFFFFFFFFFFF
+        for length in range(lo, hi + 1):
+            h = (h * 131 + ord(reference[ref_pos + length - 1])) & 0xFFFFFFFFFFFFFFFF
+            if h in accepted_hashes:
+                continue
+            results.append(({
+                'sequence': reference[ref_pos:ref_pos + length],
+                'seq_len': length,
+                'positions': positions,
+                'count': len(positions),
+                'reversed': is_reversed
+            }, ref_pos))
+            accepted_hashes.add(h)
+
+    # 使用栈在一趟扫描中枚举所有LCP区间
+    stack = [(0, 0)]  # (lcp值, 区间左边界)
+    for i in range(1, n + 1):
+        lb = i - 1
+        cur = int(lcp[i - 1]) if i < n else 0
+        while cur < stack[-1][0]:
+            top_depth, top_lb = stack.pop()
+            emit_interval(top_depth, top_lb, i - 1, max(cur, stack[-1][0]))
+            lb = top_lb
+        if cur > stack[-1][0]:
+            stack.append((cur, lb))
+
+def build_kmer_index(sequence, k):
+    """构建k-mer索引：将每个长度为k的子串映射到其在序列中的起始位置列表
+
+    用于避免对同一序列的反复全串扫描：查找长度>=k的子串时，
+    先通过其k-mer前缀定位候选位置，再做一次切片比较验证。
+
+    参数:
+        sequence: 待索引的序列
+        k: k-mer长度
+    """
+    from collections import defaultdict
+    index = defaultdict(list)
+    for i in range(len(sequence) - k + 1):
+        index[sequence[i:i+k]].append(i)
+    return index
+
+# 碱基到2-bit编码的映射表（A=0,C=1,G=2,T=3，其他字符标记为255）
+_BASE2BIT = np.full(256, 255, dtype=np.uint8)
+for _i, _c in enumerate('ACGT'):
+    _BASE2BIT[ord(_c)] = _i
+
+def encode_2bit(sequence):
+    """将纯ACGT序列编码为0..3的uint8数组
+
+    含其他字符（如N）时返回None，调用方应退回字符串路径。
+    """
+    codes = _BASE2BIT[np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)]
+    if (codes == 255).any():
+        return None
+    return codes
+
+def _kmer_codes(codes, k):
+    """向量化计算所有k-mer的2k位整数编码（要求k<=32）
+
+    每个k-mer打包为一个uint64，32个碱基以内整数比较即等价于序列比较。
+    """
+    n = codes.shape[0] - k + 1
+    out = np.zeros(n, dtype=np.uint64)
+    for i in range(k):
+        out = (out << np.uint64(2)) | codes[i:i+n].astype(np.uint64)
+    return out
+
+def _make_kmer_index(sequence, k):
+    """构建k-mer索引，优先使用2-bit打包的整数键
+
+    整数键避免了字符串切片的分配和逐字符哈希；
+    序列含非ACGT字符或k>32时退回字符串键索引。
+    返回(索引字典, 是否为整数键)。
+    """
+    if k <= 32:
+        codes = encode_2bit(sequence)
+        if codes is not None and codes.shape[0] >= k:
+            from collections import defaultdict
+            index = defaultdict(list)
+            for i, key in enumerate(_kmer_codes(codes, k)):
+                index[int(key)].append(i)
+            return index, True
+    return build_kmer_index(sequence, k), False
+
+def _find_occurrences(sequence, index, k, subseq, packed=False):
+    """通过k-mer索引查找subseq在sequence中的所有起始位置（含重叠）"""
+    length = len(subseq)
+    if packed:
+        key = 0
+        for base in subseq[:k]:
+            key = (key << 2) | int(_BASE2BIT[ord(base)])
+    else:
+        key = subseq[:k]
+    return [p for p in index[key] if sequence[p:p+length] == subseq]
+
+def _has_min_occurrences(sequence, index, k, subseq, packed, n):
+    """判断subseq在sequence中是否至少出现n次
+
+    达到n次即提前返回，不收集全部位置，供剪枝判断使用。
+    """
+    length = len(subseq)
+    if packed:
+        key = 0
+        for base in subseq[:k]:
+            key = (key << 2) | int(_BASE2BIT[ord(base)])
+    else:
+        key = subseq[:k]
+    found = 0
+    for p in index[key]:
+        if sequence[p:p+length] == subseq:
+            found += 1
+            if found >= n:
+                return True
+    return False
+
+def _occurrences_multi(text, patterns):
+    """一次扫描text，返回每个pattern到其全部出现位置（含重叠）的映射
+
+    pyahocorasick可用时构建多模式自动机，把N次单模式查找合并为
+    一次O(len(text)+总命中数)的线性扫描；否则退回逐个str.find。
+    """
+    positions = {pattern: [] for pattern in patterns}
+    if ahocorasick is not None and positions:
+        automaton = ahocorasick.Automaton()
+        for pattern in positions:
+            automaton.add_word(pattern, pattern)
+        automaton.make_automaton()
+        for end_index, pattern in automaton.iter(text):
+            positions[pattern].append(end_index - len(pattern) + 1)
+    else:
+        for pattern in positions:
+            pos = 0
+            while True:
+                pos = text.find(pattern, pos)
+                if pos == -1:
+                    break
+                positions[pattern].append(pos)
+                pos += 1
+    return positions
+
+# 暴力扫描回退路径启用多进程的规模阈值（ref_len*query_len）
+# 低于该规模时进程创建和序列分发的开销会超过并行收益
+_SCAN_PARALLEL_THRESHOLD = 1_000_000
+
+# 去重位图的最大单元数（约64MB布尔值）
+# 超过该规模时改用坐标集合，避免对超长输入做O(ref_len*max_length)的稠密分配
+_SEEN_BITMAP_MAX_CELLS = 1 << 26
+
+def _scan_chunk(reference, target, is_reversed, start, end, min_length, max_length, k):
+    """对ref_start属于[start, end)的候选执行暴力扫描，供并行工作进程调用
+
+    与串行扫描的内层逻辑一致，但不做跨块去重：
+    由于接受条件要求子串在reference中唯一，单趟内不会产生重复，
+    正反两趟之间的去重由父进程在合并时完成。
+    """
+    ref_index, ref_packed = _make_kmer_index(reference, k)
+    target_index, target_packed = _make_kmer_index(target, k)
+    results = []
+    ref_len = len(reference)
+
+    for ref_start in range(start, end):
+        ref_unique = False
+        for length in range(min_length, min(max_length + 1, ref_len - ref_start + 1)):
+            if length == 1:
+                continue
+            ref_subseq = reference[ref_start:ref_start+length]
+
+            positions = _find_occurrences(target, target_index, k, ref_subseq, target_packed)
+            if len(positions) < 2:
+                break
+
+            if not ref_unique:
+                ref_positions = _find_occurrences(reference, ref_index, k, ref_subseq, ref_packed)
+                ref_unique = len(ref_positions) == 1
+
+            if ref_unique:
+                results.append({
+                    'sequence': ref_subseq,
+                    'seq_len': length,
+                    'positions': positions,
+                    'count': len(positions),
+                    'reversed': is_reversed
+                })
+
+    return results
+
+def _scan_pass_parallel(reference, target, is_reversed, min_length, max_length, k):
+    """将一趟扫描的ref_start区间分块分发到多个工作进程并按原顺序合并结果"""
+    total = len(reference) - min_length + 1
+    n_workers = os.cpu_count() or 1
+    chunk_size = (total + n_workers - 1) // n_workers
+
+    results = []
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = [
+            executor.submit(_scan_chunk, reference, target, is_reversed,
+                            s, min(s + chunk_size, total), min_length, max_length, k)
+            for s in range(0, total, chunk_size)
+        ]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+def find_repeats_suffix_array(reference, query, min_length=1, max_length=None):
+    """使用后缀数组方法查找重复序列及其位置
+
+    与find_repeats_brute_force语义相同，但用O(L log L)的后缀数组构建
+    加一趟线性LCP区间扫描替代O(L^3)的暴力枚举。
+
+    参数:
+        reference: 参考序列
+        query: 查询序列
+        min_length: 最小子序列长度
+        max_length: 最大子序列长度，如果为None则使用两个序列的最小长度
+    """
+    start_time = time.time()
+
+    accepted_hashes = set()
+    tagged_results = []
+
+    ref_len = len(reference)
+    query_len = len(query)
+
+    # 设置最大长度限制
+    if max_length is None:
+        max_length = min(ref_len, query_len)
+    else:
+        max_length = min(max_length, ref_len, query_len)
+
+    # 正向搜索
+    print("开始正向搜索...")
+    _collect_repeats_suffix_array(reference, query, False, min_length, max_length, accepted_hashes, tagged_results)
+
+    # 反向搜索
+    print("开始反向搜索...")
+    query_rev = reverse_complement(query)
+    _collect_repeats_suffix_array(reference, query_rev, True, min_length, max_length, accepted_hashes, tagged_results)
+
+    # 按序列长度降序排序，等长时保持与暴力实现一致的顺序（正向在前，按reference位置升序）
+    tagged_results.sort(key=lambda x: (-x[0]['seq_len'], x[0]['reversed'], x[1]))
+    results = [r for r, _ in tagged_results]
+
+    end_time = time.time()
+    print(f"后缀数组查找重复序列耗时: {end_time - start_time:.2f} 秒")
+
+    return results
 
 def find_repeats_brute_force(reference, query, min_length=1, max_length=None):
     """使用暴力匹配方法查找重复序列及其位置
@@ -20,6 +343,10 @@ def find_repeats_brute_force(reference, query, min_length=1, max_length=None):
         min_length: 最小子序列长度
         max_length: 最大子序列长度，如果为None则使用两个序列的最小长度
     """
+    # 当pydivsufsort可用时走后缀数组快速路径，结果与暴力扫描一致
+    if divsufsort is not None:
+        return find_repeats_suffix_array(reference, query, min_length, max_length)
+
     # 记录开始时间
     start_time = time.time()
     
@@ -35,110 +362,166 @@ def find_repeats_brute_force(reference, query, min_length=1, max_length=None):
         max_length = min(ref_len, query_len)
     else:
         max_length = min(max_length, ref_len, query_len)
-    
+
+    # 构建k-mer索引，将每个候选子串的全串扫描替换为索引查找+验证
+    k = max(min_length, 2)
+
+    # 规模较大时外层ref_start循环是天然可并行的，
+    # 按区间分块分发到多个工作进程，合并后在父进程完成跨趟去重
+    if (os.cpu_count() or 1) > 1 and ref_len * query_len >= _SCAN_PARALLEL_THRESHOLD:
+        print("开始正向搜索...")
+        results = _scan_pass_parallel(reference, query, False, min_length, max_length, k)
+        for result in results:
+            unique_sequences.add(result['sequence'])
+
+        print("开始反向搜索...")
+        query_rev = reverse_complement(query)
+        results.extend(
+            result for result in _scan_pass_parallel(reference, query_rev, True, min_length, max_length, k)
+            if result['sequence'] not in unique_sequences
+        )
+
+        # 按序列长度降序排序
+        results.sort(key=itemgetter('seq_len'), reverse=True)
+
+        end_time = time.time()
+        print(f"暴力匹配查找重复序列耗时: {end_time - start_time:.2f} 秒")
+        return results
+
+    ref_index, ref_packed = _make_kmer_index(reference, k)
+    query_index, query_packed = _make_kmer_index(query, k)
+
+    # reference侧的出现位置查询在正反两趟中会命中相同的子串，
+    # 用记忆化让两趟共享查询结果；缓存随本次调用的局部作用域一起释放
+    @lru_cache(maxsize=None)
+    def ref_occ(subseq):
+        return _find_occurrences(reference, ref_index, k, subseq, ref_packed)
+
+    # 用(ref_start, length)位置标记代替字符串集合做去重：
+    # 被接受的子串在reference中唯一，等值的子串必然出自同一位置，
+    # 因此按位置标记与按字符串内容去重等价，且省去O(长度)的哈希开销。
+    # 稠密位图是O(ref_len*max_length)的分配，超过阈值时（如单核主机上
+    # 串行处理超长输入）退回坐标元组集合，内存只随被接受的候选数增长
+    if (ref_len + 1) * (max_length + 1) <= _SEEN_BITMAP_MAX_CELLS:
+        seen = np.zeros((ref_len + 1, max_length + 1), dtype=bool)
+
+        def seen_before(ref_start, length):
+            return seen[ref_start, length]
+
+        def mark_seen(ref_start, length):
+            seen[ref_start, length] = True
+    else:
+        seen = set()
+
+        def seen_before(ref_start, length):
+            return (ref_start, length) in seen
+
+        def mark_seen(ref_start, length):
+            seen.add((ref_start, length))
+
+    # 每趟搜索分两个阶段：先枚举通过剪枝和唯一性检查的候选子串，
+    # 再用一次多模式扫描批量获取所有候选在目标序列中的位置
     # 正向搜索
     print("开始正向搜索...")
+    candidates = []
     for ref_start in range(ref_len - min_length + 1):
         # 每处理1000个位置打印一次进度
         if ref_start % 1000 == 0 and ref_start > 0:
             print(f"正向搜索进度: {ref_start}/{ref_len - min_length + 1}")
-            
+
+        ref_unique = False
         for length in range(min_length, min(max_length + 1, ref_len - ref_start + 1)):
             # 从reference中提取子序列
             ref_subseq = reference[ref_start:ref_start+length]
-            
+
             # 忽略单个碱基的重复序列
             if length == 1:
                 continue
-                
-            # 如果序列已经添加过，则跳过
-            if ref_subseq in unique_sequences:
+
+            # 如果该位置的序列已经添加过，则跳过
+            if seen_before(ref_start, length):
                 continue
-            
-            # 在query中查找所有匹配位置
-            positions = []
-            pos = 0
-            while True:
-                pos = query.find(ref_subseq, pos)
-                if pos == -1:
-                    break
-                positions.append(pos)
-                pos += 1
-            
-            # 检查序列在reference中的出现次数
-            ref_positions = []
-            ref_pos = 0
-            while True:
-                ref_pos = reference.find(ref_subseq, ref_pos)
-                if ref_pos == -1:
-                    break
-                ref_positions.append(ref_pos)
-                ref_pos += 1
-            
+
+            # 单调性剪枝：长度L不足两次匹配时，L+1的任何扩展也不可能满足
+            # 这里只验证到两次出现即止，完整位置留给批量扫描
+            if not _has_min_occurrences(query, query_index, k, ref_subseq, query_packed, 2):
+                break
+
+            # 检查序列在reference中的出现次数（通过k-mer索引）
+            # 一旦某长度在reference中唯一，其任何扩展也必然唯一，无需再查
+            if not ref_unique:
+                ref_unique = len(ref_occ(ref_subseq)) == 1
+
             # 只有当序列在reference中仅出现一次，但在query中出现多次时，才认为是重复序列
-            if len(ref_positions) == 1 and len(positions) > 1:
-                results.append({
-                    'sequence': ref_subseq,
-                    'positions': positions,
-                    'count': len(positions),
-                    'reversed': False
-                })
-                # 添加到已处理序列集合中
-                unique_sequences.add(ref_subseq)
-    
-    # 反向搜索
-    print("开始反向搜索...")
+            if ref_unique:
+                candidates.append(ref_subseq)
+                # 标记已处理位置
+                mark_seen(ref_start, length)
+
+    # 一次Aho-Corasick扫描获取所有候选的出现位置
+    occurrences = _occurrences_multi(query, candidates)
+    for ref_subseq in candidates:
+        positions = occurrences[ref_subseq]
+        results.append({
+            'sequence': ref_subseq,
+            'seq_len': len(ref_subseq),
+            'positions': positions,
+            'count': len(positions),
+            'reversed': False
+        })
+
+    # 反向搜索与正向搜索流程相同，目标换为反向互补的query
     query_rev = reverse_complement(query)
+    query_rev_index, query_rev_packed = _make_kmer_index(query_rev, k)
+    print("开始反向搜索...")
+    candidates = []
     for ref_start in range(ref_len - min_length + 1):
         # 每处理1000个位置打印一次进度
         if ref_start % 1000 == 0 and ref_start > 0:
             print(f"反向搜索进度: {ref_start}/{ref_len - min_length + 1}")
-            
+
+        ref_unique = False
         for length in range(min_length, min(max_length + 1, ref_len - ref_start + 1)):
             # 从reference中提取子序列
             ref_subseq = reference[ref_start:ref_start+length]
-            
+
             # 忽略单个碱基的重复序列
             if length == 1:
                 continue
-                
-            # 如果序列已经添加过，则跳过
-            if ref_subseq in unique_sequences:
+
+            # 如果该位置的序列已经添加过，则跳过
+            if seen_before(ref_start, length):
                 continue
-            
-            # 在反向互补的query中查找所有匹配位置
-            positions = []
-            pos = 0
-            while True:
-                pos = query_rev.find(ref_subseq, pos)
-                if pos == -1:
-                    break
-                positions.append(pos)
-                pos += 1
-            
-            # 检查序列在reference中的出现次数
-            ref_positions = []
-            ref_pos = 0
-            while True:
-                ref_pos = reference.find(ref_subseq, ref_pos)
-                if ref_pos == -1:
-                    break
-                ref_positions.append(ref_pos)
-                ref_pos += 1
-            
+
+            # 单调性剪枝：长度L不足两次匹配时，L+1的任何扩展也不可能满足
+            if not _has_min_occurrences(query_rev, query_rev_index, k, ref_subseq, query_rev_packed, 2):
+                break
+
+            # 检查序列在reference中的出现次数（通过k-mer索引）
+            # 一旦某长度在reference中唯一，其任何扩展也必然唯一，无需再查
+            if not ref_unique:
+                ref_unique = len(ref_occ(ref_subseq)) == 1
+
             # 只有当序列在reference中仅出现一次，但在反向互补的query中出现多次时，才认为是重复序列
-            if len(ref_positions) == 1 and len(positions) > 1:
-                results.append({
-                    'sequence': ref_subseq,
-                    'positions': positions,
-                    'count': len(positions),
-                    'reversed': True
-                })
-                # 添加到已处理序列集合中
-                unique_sequences.add(ref_subseq)
-    
+            if ref_unique:
+                candidates.append(ref_subseq)
+                # 标记已处理位置
+                mark_seen(ref_start, length)
+
+    # 一次Aho-Corasick扫描获取所有候选的出现位置
+    occurrences = _occurrences_multi(query_rev, candidates)
+    for ref_subseq in candidates:
+        positions = occurrences[ref_subseq]
+        results.append({
+            'sequence': ref_subseq,
+            'seq_len': len(ref_subseq),
+            'positions': positions,
+            'count': len(positions),
+            'reversed': True
+        })
+
     # 按序列长度降序排序
-    results.sort(key=lambda x: len(x['sequence']), reverse=True)
+    results.sort(key=itemgetter('seq_len'), reverse=True)
     
     # 计算并打印运行时间
     end_time = time.time()
@@ -169,70 +552,92 @@ def visualize_matches(reference, query, repeats, figsize=(12, 10), alpha=0.5, po
     # 添加网格线
     ax.grid(True, linestyle='--', alpha=0.5)
     
-    # 绘制匹配点
-    forward_x = []
-    forward_y = []
-    reverse_x = []
-    reverse_y = []
-    
+    # 绘制匹配点：每个重复的坐标作为numpy数组块收集，最后一次性拼接，
+    # 避免在Python层逐点append
+    fwd_x_chunks = []
+    fwd_y_chunks = []
+    rev_x_chunks = []
+    rev_y_chunks = []
+
+    # 反向互补序列只需计算一次，避免在循环内对每个重复重新计算
+    # find结果按子串缓存，避免对同一子串重复全串扫描
+    query_rev = reverse_complement(query)
+    q_pos_fwd = {}
+    q_pos_rev = {}
+
+    # 线段先收集到列表，最后一次性创建LineCollection，
+    # 避免每条匹配线段各生成一个Line2D艺术家对象
+    fwd_segs = []
+    rev_segs = []
+
     # 收集正向和反向匹配的坐标
     for repeat in repeats:
-        seq_len = len(repeat['sequence'])
+        seq_len = repeat['seq_len']
         for pos in repeat['positions']:
             if repeat['reversed']:
                 # 反向互补匹配 - 绿色
                 # 对于反向互补，我们需要找到query中的对应位置
-                query_rev = reverse_complement(query)
                 subseq = repeat['sequence']
-                q_pos = query_rev.find(subseq)
+                q_pos = q_pos_rev.get(subseq)
+                if q_pos is None:
+                    q_pos = q_pos_rev[subseq] = query_rev.find(subseq)
                 if q_pos != -1:
                     # 只为较长的匹配添加线段，减少过度绘制
                     if seq_len > 10:  # 增加长度阈值，减少线段数量
                         # 添加线段
-                        ax.plot([pos, pos + seq_len - 1], [q_pos, q_pos + seq_len - 1], 'g-', linewidth=line_width, alpha=alpha)
+                        rev_segs.append([(pos, q_pos), (pos + seq_len - 1, q_pos + seq_len - 1)])
                     # 对于较短的序列，只添加端点，减少点的数量
                     if seq_len <= 10 or seq_len > 20:
-                        reverse_x.append(pos)
-                        reverse_y.append(q_pos)
-                        reverse_x.append(pos + seq_len - 1)
-                        reverse_y.append(q_pos + seq_len - 1)
+                        idx = np.array([0, seq_len - 1], dtype=np.int32)
                     else:
-                        # 对于中等长度的序列，添加更多点以保持可见性
-                        for i in range(0, seq_len, 2):  # 每隔2个碱基添加一个点
-                            reverse_x.append(pos + i)
-                            reverse_y.append(q_pos + i)
+                        # 对于中等长度的序列，添加更多点以保持可见性（每隔2个碱基一个点）
+                        idx = np.arange(0, seq_len, 2, dtype=np.int32)
+                    rev_x_chunks.append(pos + idx)
+                    rev_y_chunks.append(q_pos + idx)
             else:
                 # 正向匹配 - 红色
                 # 找到query中的对应位置
                 subseq = repeat['sequence']
-                q_pos = query.find(subseq)
+                q_pos = q_pos_fwd.get(subseq)
+                if q_pos is None:
+                    q_pos = q_pos_fwd[subseq] = query.find(subseq)
                 if q_pos != -1:
                     # 只为较长的匹配添加线段，减少过度绘制
                     if seq_len > 10:  # 增加长度阈值，减少线段数量
                         # 添加线段
-                        ax.plot([pos, pos + seq_len - 1], [q_pos, q_pos + seq_len - 1], 'r-', linewidth=line_width, alpha=alpha)
+                        fwd_segs.append([(pos, q_pos), (pos + seq_len - 1, q_pos + seq_len - 1)])
                     # 对于较短的序列，只添加端点，减少点的数量
                     if seq_len <= 10 or seq_len > 20:
-                        forward_x.append(pos)
-                        forward_y.append(q_pos)
-                        forward_x.append(pos + seq_len - 1)
-                        forward_y.append(q_pos + seq_len - 1)
+                        idx = np.array([0, seq_len - 1], dtype=np.int32)
                     else:
-                        # 对于中等长度的序列，添加更多点以保持可见性
-                        for i in range(0, seq_len, 2):  # 每隔2个碱基添加一个点
-                            forward_x.append(pos + i)
-                            forward_y.append(q_pos + i)
+                        # 对于中等长度的序列，添加更多点以保持可见性（每隔2个碱基一个点）
+                        idx = np.arange(0, seq_len, 2, dtype=np.int32)
+                    fwd_x_chunks.append(pos + idx)
+                    fwd_y_chunks.append(q_pos + idx)
     
+    # 将所有线段一次性加入两个LineCollection，整体只占两个艺术家对象
+    from matplotlib.collections import LineCollection
+    fwd_lines = LineCollection(fwd_segs, colors='red', linewidths=line_width, alpha=alpha)
+    rev_lines = LineCollection(rev_segs, colors='green', linewidths=line_width, alpha=alpha)
+    ax.add_collection(fwd_lines)
+    ax.add_collection(rev_lines)
+
+    # 在C层拼接所有坐标块
+    forward_x = np.concatenate(fwd_x_chunks) if fwd_x_chunks else np.empty(0, np.int32)
+    forward_y = np.concatenate(fwd_y_chunks) if fwd_y_chunks else np.empty(0, np.int32)
+    reverse_x = np.concatenate(rev_x_chunks) if rev_x_chunks else np.empty(0, np.int32)
+    reverse_y = np.concatenate(rev_y_chunks) if rev_y_chunks else np.empty(0, np.int32)
+
     # 绘制正向匹配点（红色）
     forward_scatter = ax.scatter(forward_x, forward_y, color='red', s=point_size, alpha=alpha, label='Forward')
     # 绘制反向互补匹配点（绿色）
     reverse_scatter = ax.scatter(reverse_x, reverse_y, color='green', s=point_size, alpha=alpha, label='Reverse')
-    
+
     # 设置单选按钮UI - 移动到左上角，避免与图形重叠
     from matplotlib.widgets import RadioButtons
     rax = plt.axes([0.02, 0.85, 0.15, 0.15], facecolor='lightgoldenrodyellow')
     radio = RadioButtons(rax, ('Both', 'Forward', 'Reverse'))
-    
+
     # 创建图例标记 - 移动到左侧，避免与图形重叠
     legend_ax = plt.axes([0.02, 0.75, 0.15, 0.05], frameon=False)
     legend_ax.set_xticks([])
@@ -241,30 +646,19 @@ def visualize_matches(reference, query, repeats, figsize=(12, 10), alpha=0.5, po
     legend_ax.scatter([0.1], [0.3], color='green', s=30, label='Reverse')
     legend_ax.text(0.2, 0.7, 'Forward', verticalalignment='center')
     legend_ax.text(0.2, 0.3, 'Reverse', verticalalignment='center')
-    
+
     def update_visibility(label):
-        # 更新线段和点的可见性
-        if label == 'Both':
-            for line in ax.lines:
-                line.set_visible(True)
-            for dot in ax.collections:
-                dot.set_visible(True)
-        elif label == 'Forward':
-            # 显示正向匹配（红色）
-            for i, line in enumerate(ax.lines):
-                line.set_visible('r-' in str(line.get_color()))
-            ax.collections[0].set_visible(True)
-            ax.collections[1].set_visible(False)
-        elif label == 'Reverse':
-            # 显示反向互补匹配（绿色）
-            for i, line in enumerate(ax.lines):
-                line.set_visible('g-' in str(line.get_color()))
-            ax.collections[0].set_visible(False)
-            ax.collections[1].set_visible(True)
+        # 直接切换两组集合的可见性，无需遍历所有线段
+        show_fwd = label in ('Both', 'Forward')
+        show_rev = label in ('Both', 'Reverse')
+        fwd_lines.set_visible(show_fwd)
+        forward_scatter.set_visible(show_fwd)
+        rev_lines.set_visible(show_rev)
+        reverse_scatter.set_visible(show_rev)
         fig.canvas.draw_idle()
-    
+
     radio.on_clicked(update_visibility)
-    
+
     # 显示图形
     # 使用subplots_adjust代替tight_layout，避免与RadioButtons和legend_ax冲突
     plt.subplots_adjust(left=0.25, right=0.95, top=0.95, bottom=0.1)
@@ -283,7 +677,7 @@ def main(max_output=None):
     file_path = input("请输入DNA序列文件路径（默认为'测试.txt'）：").strip()
     if not file_path:
         file_path = "测试.txt"
-    
+
     # 如果未指定max_output，询问用户
     if max_output is None:
         max_output_input = input("请输入要显示的重复序列数量（默认为全部显示）：").strip()
@@ -293,7 +687,7 @@ def main(max_output=None):
             except ValueError:
                 print("输入无效，将显示所有重复序列")
                 max_output = None
-    
+
     # 创建输出文件
     output_file = open("brute_force_results.txt", "w", encoding="utf-8")
     
@@ -338,12 +732,23 @@ def main(max_output=None):
     print_and_write(output_file, "\n找到的重复序列：")
     # 根据max_output参数控制输出数量，如果为None则输出所有序列
     output_repeats = repeats if max_output is None else repeats[:max_output]
+    # 批量累积输出内容，每1000条记录合并写出一次，
+    # 避免每条记录多次print带来的格式化和系统调用开销
+    buf = []
     for i, repeat in enumerate(output_repeats):
-        print_and_write(output_file, f"序列: {repeat['sequence']} (长度: {len(repeat['sequence'])})")
-        print_and_write(output_file, f"位置: {repeat['positions']}")
-        print_and_write(output_file, f"重复次数: {repeat['count']}")
-        print_and_write(output_file, f"是否逆转: {'是' if repeat['reversed'] else '否'}")
-        print_and_write(output_file, "")
+        buf.append(f"序列: {repeat['sequence']} (长度: {repeat['seq_len']})\n"
+                   f"位置: {repeat['positions']}\n"
+                   f"重复次数: {repeat['count']}\n"
+                   f"是否逆转: {'是' if repeat['reversed'] else '否'}\n\n")
+        if len(buf) >= 1000:
+            chunk = ''.join(buf)
+            sys.stdout.write(chunk)
+            output_file.write(chunk)
+            buf.clear()
+    if buf:
+        chunk = ''.join(buf)
+        sys.stdout.write(chunk)
+        output_file.write(chunk)
     
     # 关闭输出文件
     output_file.close()
@@ -1,149 +1,676 @@
 import matplotlib.pyplot as plt
 import numpy as np
+import sys
+import threading
+from functools import lru_cache
 
+# 可选依赖：numba将Smith-Waterman的双重循环编译为本地代码
+# 未安装时回退到纯Python实现
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = None
+
+# 可选依赖：pydivsufsort提供C实现的后缀数组构建，用于加速重复序列查找
+# 如果未安装则回退到逐子串扫描实现
+try:
+    from pydivsufsort import divsufsort, kasai
+except ImportError:
+    divsufsort = None
+    kasai = None
+
+# 可选依赖：pyahocorasick提供C实现的多模式匹配自动机，
+# 用一次线性扫描代替对每个候选子串的单独查找
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# 可选依赖：parasail提供SIMD（striped）实现的Smith-Waterman，
+# 比任何Python/numba循环都快一个数量级以上
+try:
+    import parasail
+except ImportError:
+    parasail = None
+
+# 碱基互补映射表，str.translate在C层一次完成整条序列的互补转换
+_RC_TABLE = str.maketrans('ACGTacgtN', 'TGCAtgcaN')
+
+@lru_cache(maxsize=16)
 def reverse_complement(sequence):
-    """生成DNA序列的反向互补序列"""
-    complement = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
-    return ''.join(complement.get(base, base) for base in reversed(sequence))
+    """生成DNA序列的反向互补序列
+
+    结果按输入串缓存，find_repeats和visualize_matches对同一条
+    query的重复调用直接命中缓存。
+    """
+    return sequence.translate(_RC_TABLE)[::-1]
+
+# 回溯矩阵的整数编码：0=终止，1=匹配，2=删除，3=插入
+TB_STOP, TB_MATCH, TB_DELETE, TB_INSERT = 0, 1, 2, 3
+
+# 碱基到小整数编码的映射表（A/C/G/T -> 0..3，其他字符 -> 4）
+_SW_LUT = np.full(256, 4, np.int8)
+_SW_LUT[[65, 67, 71, 84]] = [0, 1, 2, 3]
+
+def _encode_sequence(sequence):
+    """将序列经查找表编码为0..4的int8数组，供核函数按小整数比较"""
+    return _SW_LUT[np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)]
+
+# 线程本地的得分行缓冲，跨调用复用，避免对大量短序列对比对时反复分配
+_SW_BUFS = threading.local()
+
+def _sw_row_buffers(n):
+    """返回两条长度为n+1的int32滚动行缓冲（已清零）
+
+    缓冲按线程缓存并只在需要更长时重新分配，
+    将逐次调用的分配开销摊销为O(1)。
+    """
+    prev = getattr(_SW_BUFS, 'prev', None)
+    if prev is None or prev.shape[0] < n + 1:
+        _SW_BUFS.prev = np.zeros(n + 1, np.int32)
+        _SW_BUFS.curr = np.zeros(n + 1, np.int32)
+    prev = _SW_BUFS.prev[:n + 1]
+    curr = _SW_BUFS.curr[:n + 1]
+    prev.fill(0)
+    curr.fill(0)
+    return prev, curr
+
+def _sw_fill_py(reference, query, match_score, mismatch_penalty, gap_penalty):
+    """纯Python实现的得分矩阵填充（numba不可用时的回退路径）
 
-def smith_waterman(reference, query, match_score=2, mismatch_penalty=-1, gap_penalty=-1):
-    """实现Smith-Waterman局部序列比对算法"""
+    得分只依赖上一行，用两行滚动缓冲代替完整得分矩阵；
+    回溯所需的完整信息保留在回溯矩阵中。
+    """
     m, n = len(reference), len(query)
-    # 初始化得分矩阵和回溯矩阵
-    score_matrix = [[0] * (n + 1) for _ in range(m + 1)]
-    traceback = [[None] * (n + 1) for _ in range(m + 1)]
-    
-    # 填充得分矩阵
+    prev = [0] * (n + 1)
+    curr = [0] * (n + 1)
+    traceback = [[TB_STOP] * (n + 1) for _ in range(m + 1)]
+
     max_score = 0
     max_pos = (0, 0)
-    
+
     for i in range(1, m + 1):
         for j in range(1, n + 1):
             # 计算匹配得分
-            match = score_matrix[i-1][j-1] + (match_score if reference[i-1] == query[j-1] else mismatch_penalty)
+            match = prev[j-1] + (match_score if reference[i-1] == query[j-1] else mismatch_penalty)
             # 计算插入和删除得分
-            delete = score_matrix[i-1][j] + gap_penalty
-            insert = score_matrix[i][j-1] + gap_penalty
-            
+            delete = prev[j] + gap_penalty
+            insert = curr[j-1] + gap_penalty
+
             # 选择最大得分
-            score_matrix[i][j] = max(0, match, delete, insert)
-            
+            score = max(0, match, delete, insert)
+            curr[j] = score
+
             # 更新回溯矩阵
-            if score_matrix[i][j] == 0:
-                traceback[i][j] = None
-            elif score_matrix[i][j] == match:
-                traceback[i][j] = 'match'
-            elif score_matrix[i][j] == delete:
-                traceback[i][j] = 'delete'
+            if score == 0:
+                traceback[i][j] = TB_STOP
+            elif score == match:
+                traceback[i][j] = TB_MATCH
+            elif score == delete:
+                traceback[i][j] = TB_DELETE
             else:
-                traceback[i][j] = 'insert'
-            
+                traceback[i][j] = TB_INSERT
+
             # 更新最大得分位置
-            if score_matrix[i][j] > max_score:
-                max_score = score_matrix[i][j]
+            if score > max_score:
+                max_score = score
                 max_pos = (i, j)
-    
+        prev, curr = curr, prev
+        for j in range(n + 1):
+            curr[j] = 0
+
     return max_score, max_pos, traceback
 
-def find_repeats(reference, query, min_length=1):
-    """查找重复序列及其位置，忽略单个碱基的重复"""
-    results = []
-    query_len = len(query)
-    ref_len = len(reference)
-    
-    # 用于跟踪已经添加的序列，避免重复输出
-    unique_sequences = set()
-    
-    # 正向搜索
-    for i in range(query_len - min_length + 1):
-        for length in range(min_length, query_len - i + 1):
-            subseq = query[i:i+length]
-            
-            # 忽略单个碱基的重复序列
-            if length == 1:
-                continue
-                
-            # 如果序列已经添加过，则跳过
-            if subseq in unique_sequences:
-                continue
-                
-            positions = []
+def _sw_score_py(reference, query, match_score, mismatch_penalty, gap_penalty):
+    """只计算最大得分及其位置的纯Python实现，使用两行滚动缓冲"""
+    m, n = len(reference), len(query)
+    prev = [0] * (n + 1)
+    curr = [0] * (n + 1)
+
+    max_score = 0
+    max_pos = (0, 0)
+
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            match = prev[j-1] + (match_score if reference[i-1] == query[j-1] else mismatch_penalty)
+            delete = prev[j] + gap_penalty
+            insert = curr[j-1] + gap_penalty
+            score = max(0, match, delete, insert)
+            curr[j] = score
+            if score > max_score:
+                max_score = score
+                max_pos = (i, j)
+        prev, curr = curr, prev
+        for j in range(n + 1):
+            curr[j] = 0
+
+    return max_score, max_pos
+
+def _sw_score_numpy_diag(reference, query, match_score, mismatch_penalty, gap_penalty):
+    """按反对角线向量化的得分计算（numba不可用时的SIMD路径）
+
+    同一条反对角线上的单元格相互独立，可以整条用NumPy的
+    向量化maximum/add一次算完，由NumPy内部发射SIMD指令。
+    只保留三条反对角线的滚动缓冲，不分配完整矩阵。
+    """
+    m, n = len(reference), len(query)
+    ref_codes = _encode_sequence(reference)
+    query_codes = _encode_sequence(query)
+
+    # 以i为下标的三条反对角线滚动缓冲
+    prev2 = np.zeros(m + 1, np.int32)
+    prev1 = np.zeros(m + 1, np.int32)
+    curr = np.zeros(m + 1, np.int32)
+
+    max_score = 0
+    max_pos = (0, 0)
+
+    for d in range(2, m + n + 1):
+        i_lo = max(1, d - n)
+        i_hi = min(m, d - 1)
+
+        # 单元格(i, d-i)的碱基对：reference[i-1]与query[d-i-1]
+        a = ref_codes[i_lo-1:i_hi]
+        b = query_codes[d-i_hi-1:d-i_lo][::-1]
+
+        match = np.where(a == b, match_score, mismatch_penalty)
+        diag = prev2[i_lo-1:i_hi] + match
+        delete = prev1[i_lo-1:i_hi] + gap_penalty
+        insert = prev1[i_lo:i_hi+1] + gap_penalty
+
+        curr.fill(0)
+        seg = np.maximum(np.maximum(diag, delete), insert)
+        np.maximum(seg, 0, out=seg)
+        curr[i_lo:i_hi+1] = seg
+
+        # 与行主序扫描相同的平局语义：取得分最大且(i, j)字典序最小的单元格
+        d_max = int(seg.max()) if seg.size else 0
+        if d_max > max_score:
+            max_score = d_max
+            max_pos = (m + 1, n + 1)
+        if max_score > 0 and d_max == max_score:
+            for k in np.nonzero(seg == max_score)[0]:
+                i = i_lo + int(k)
+                pos = (i, d - i)
+                if pos < max_pos:
+                    max_pos = pos
+
+        prev2, prev1, curr = prev1, curr, prev2
+
+    if max_score == 0:
+        max_pos = (0, 0)
+    return max_score, max_pos
+
+def _sw_fill_numpy_diag(reference, query, match_score, mismatch_penalty, gap_penalty):
+    """按反对角线向量化的得分矩阵填充（numba不可用时的SIMD路径）
+
+    与_sw_score_numpy_diag相同的滚动反对角线计算，
+    额外按相同优先级（0 > 匹配 > 删除 > 插入）向量化生成回溯编码，
+    逐条写回完整的uint8回溯矩阵供现有回溯逻辑使用。
+    """
+    m, n = len(reference), len(query)
+    ref_codes = _encode_sequence(reference)
+    query_codes = _encode_sequence(query)
+
+    # 以i为下标的三条反对角线滚动缓冲
+    prev2 = np.zeros(m + 1, np.int32)
+    prev1 = np.zeros(m + 1, np.int32)
+    curr = np.zeros(m + 1, np.int32)
+    traceback = np.zeros((m + 1, n + 1), np.uint8)
+
+    max_score = 0
+    max_pos = (0, 0)
+
+    for d in range(2, m + n + 1):
+        i_lo = max(1, d - n)
+        i_hi = min(m, d - 1)
+
+        # 单元格(i, d-i)的碱基对：reference[i-1]与query[d-i-1]
+        a = ref_codes[i_lo-1:i_hi]
+        b = query_codes[d-i_hi-1:d-i_lo][::-1]
+
+        match = np.where(a == b, match_score, mismatch_penalty)
+        diag = prev2[i_lo-1:i_hi] + match
+        delete = prev1[i_lo-1:i_hi] + gap_penalty
+        insert = prev1[i_lo:i_hi+1] + gap_penalty
+
+        curr.fill(0)
+        seg = np.maximum(np.maximum(diag, delete), insert)
+        np.maximum(seg, 0, out=seg)
+        curr[i_lo:i_hi+1] = seg
+
+        # 按优先级向量化生成整条反对角线的回溯编码
+        codes = np.where(seg == 0, TB_STOP,
+                         np.where(seg == diag, TB_MATCH,
+                                  np.where(seg == delete, TB_DELETE, TB_INSERT))).astype(np.uint8)
+        rows = np.arange(i_lo, i_hi + 1)
+        traceback[rows, d - rows] = codes
+
+        # 与行主序扫描相同的平局语义：取得分最大且(i, j)字典序最小的单元格
+        d_max = int(seg.max()) if seg.size else 0
+        if d_max > max_score:
+            max_score = d_max
+            max_pos = (m + 1, n + 1)
+        if max_score > 0 and d_max == max_score:
+            for k in np.nonzero(seg == max_score)[0]:
+                i = i_lo + int(k)
+                pos = (i, d - i)
+                if pos < max_pos:
+                    max_pos = pos
+
+        prev2, prev1, curr = prev1, curr, prev2
+
+    if max_score == 0:
+        max_pos = (0, 0)
+    return max_score, max_pos, traceback
+
+if njit is not None:
+    @njit(cache=True)
+    def _sw_fill_numba(ref_codes, query_codes, match_score, mismatch_penalty, gap_penalty):
+        """numba编译的得分矩阵填充核函数，语义与纯Python版本一致
+
+        得分用两行int32滚动缓冲，工作集从O(mn)降到O(n)并更好地
+        驻留缓存；回溯仍需完整矩阵，但每个单元格只占1字节。
+        """
+        m = ref_codes.shape[0]
+        n = query_codes.shape[0]
+        prev = np.zeros(n + 1, np.int32)
+        curr = np.zeros(n + 1, np.int32)
+        traceback = np.zeros((m + 1, n + 1), np.uint8)
+
+        max_score = 0
+        max_i = 0
+        max_j = 0
+
+        for i in range(1, m + 1):
+            for j in range(1, n + 1):
+                if ref_codes[i-1] == query_codes[j-1]:
+                    match = prev[j-1] + match_score
+                else:
+                    match = prev[j-1] + mismatch_penalty
+                delete = prev[j] + gap_penalty
+                insert = curr[j-1] + gap_penalty
+
+                # 无分支编码回溯方向，优先级与纯Python版本相同：
+                # 0 > 匹配 > 删除 > 插入（严格大于才改选后者）
+                md = max(match, delete)
+                best = max(md, insert, 0)
+                ins_best = insert > md
+                code = (1 + (delete > match) * (1 - ins_best) + 2 * ins_best) * (best > 0)
+
+                curr[j] = best
+                traceback[i, j] = code
+
+                if best > max_score:
+                    max_score = best
+                    max_i = i
+                    max_j = j
+
+            tmp = prev
+            prev = curr
+            curr = tmp
+            curr[:] = 0
+
+        return max_score, max_i, max_j, traceback
+
+    @njit(cache=True)
+    def _sw_score_numba(ref_codes, query_codes, match_score, mismatch_penalty, gap_penalty, prev, curr):
+        """只计算最大得分及其位置的核函数
+
+        得分只依赖上一行，用两行int32滚动缓冲代替完整矩阵，
+        工作集从O(mn)降到O(n)，不分配回溯矩阵。
+        两条已清零的行缓冲由调用方通过_sw_row_buffers提供并跨调用复用。
+        """
+        m = ref_codes.shape[0]
+        n = query_codes.shape[0]
+
+        max_score = 0
+        max_i = 0
+        max_j = 0
+
+        for i in range(1, m + 1):
+            for j in range(1, n + 1):
+                if ref_codes[i-1] == query_codes[j-1]:
+                    match = prev[j-1] + match_score
+                else:
+                    match = prev[j-1] + mismatch_penalty
+                delete = prev[j] + gap_penalty
+                insert = curr[j-1] + gap_penalty
+
+                best = max(match, delete, insert, 0)
+
+                curr[j] = best
+                if best > max_score:
+                    max_score = best
+                    max_i = i
+                    max_j = j
+
+            tmp = prev
+            prev = curr
+            curr = tmp
+            curr[:] = 0
+
+        return max_score, max_i, max_j
+
+    @njit(cache=True, parallel=True)
+    def _sw_fill_numba_parallel(ref_codes, query_codes, match_score, mismatch_penalty, gap_penalty):
+        """按反对角线并行填充得分矩阵
+
+        同一条反对角线上的单元格只依赖前两条反对角线，相互独立，
+        可以用prange在多核上并行计算。得分只保留三条按i索引的
+        滚动对角线缓冲，工作集从O(mn)降到O(m)；回溯矩阵仍按
+        (i,j)整块存储。
+        """
+        m = ref_codes.shape[0]
+        n = query_codes.shape[0]
+        d0 = np.zeros(m + 1, np.int32)  # 对角线d-2
+        d1 = np.zeros(m + 1, np.int32)  # 对角线d-1
+        d2 = np.zeros(m + 1, np.int32)  # 当前对角线
+        traceback = np.zeros((m + 1, n + 1), np.uint8)
+
+        max_score = 0
+        max_i = 0
+        max_j = 0
+
+        for d in range(2, m + n + 1):
+            i_lo = max(1, d - n)
+            i_hi = min(m, d - 1)
+            for i in prange(i_lo, i_hi + 1):
+                j = d - i
+                if ref_codes[i-1] == query_codes[j-1]:
+                    match = d0[i-1] + match_score
+                else:
+                    match = d0[i-1] + mismatch_penalty
+                delete = d1[i-1] + gap_penalty
+                insert = d1[i] + gap_penalty
+
+                # 无分支编码回溯方向，优先级与串行版本相同
+                md = max(match, delete)
+                best = max(md, insert, 0)
+                ins_best = insert > md
+                code = (1 + (delete > match) * (1 - ins_best) + 2 * ins_best) * (best > 0)
+
+                d2[i] = best
+                traceback[i, j] = code
+
+            # 串行归并本条对角线的最大值，平局取(i,j)字典序最小的单元格，
+            # 与串行版本按行主序扫描的结果一致
+            for i in range(i_lo, i_hi + 1):
+                s = d2[i]
+                if s > max_score or (s == max_score and s > 0 and
+                                     (i < max_i or (i == max_i and d - i < max_j))):
+                    max_score = s
+                    max_i = i
+                    max_j = d - i
+
+            # 清零紧邻有效范围的边界槽，保证后续对角线越界读取得到0
+            d2[i_lo - 1] = 0
+            if i_hi + 1 <= m:
+                d2[i_hi + 1] = 0
+
+            tmp = d0
+            d0 = d1
+            d1 = d2
+            d2 = tmp
+
+        return max_score, max_i, max_j, traceback
+else:
+    _sw_fill_numba = None
+    _sw_score_numba = None
+    _sw_fill_numba_parallel = None
+
+# 序列较短时线程调度开销超过收益，超过该规模才启用并行核函数
+_SW_PARALLEL_THRESHOLD = 1_000_000
+
+def smith_waterman(reference, query, match_score=2, mismatch_penalty=-1, gap_penalty=-1,
+                   return_traceback=True):
+    """实现Smith-Waterman局部序列比对算法
+
+    返回(最大得分, 最大得分位置, 回溯矩阵)，回溯矩阵以整数编码：
+    0=终止，1=匹配，2=删除，3=插入
+
+    当return_traceback=False时只返回(最大得分, 最大得分位置)，
+    此时使用两行滚动缓冲填充，内存从O(mn)降到O(n)。
+    """
+    if not return_traceback:
+        if _sw_score_numba is not None:
+            prev, curr = _sw_row_buffers(len(query))
+            max_score, max_i, max_j = _sw_score_numba(
+                _encode_sequence(reference), _encode_sequence(query),
+                match_score, mismatch_penalty, gap_penalty, prev, curr)
+            return int(max_score), (int(max_i), int(max_j))
+        return _sw_score_numpy_diag(reference, query, match_score, mismatch_penalty, gap_penalty)
+
+    if _sw_fill_numba is not None:
+        # 大矩阵用反对角线并行核函数，小矩阵用串行核函数避免调度开销
+        if len(reference) * len(query) >= _SW_PARALLEL_THRESHOLD:
+            fill = _sw_fill_numba_parallel
+        else:
+            fill = _sw_fill_numba
+        max_score, max_i, max_j, traceback = fill(
+            _encode_sequence(reference), _encode_sequence(query),
+            match_score, mismatch_penalty, gap_penalty)
+        return int(max_score), (int(max_i), int(max_j)), traceback
+
+    return _sw_fill_numpy_diag(reference, query, match_score, mismatch_penalty, gap_penalty)
+
+def smith_waterman_alignment(reference, query, match_score=2, mismatch_penalty=-1, gap_penalty=-1):
+    """计算Smith-Waterman最优局部比对并返回对齐后的序列串
+
+    返回(最大得分, 最大得分位置, aligned_ref, aligned_query)，
+    位置为1-based的(i, j)，对齐串中'-'表示插入或删除。
+
+    parasail可用时使用其SIMD实现（striped Smith-Waterman），
+    否则回退到smith_waterman填充矩阵后回溯。
+    """
+    # parasail对空序列不产生回溯，空输入直接走矩阵回溯路径
+    if parasail is not None and reference and query:
+        matrix = parasail.matrix_create("ACGT", match_score, mismatch_penalty)
+        # sat版本先尝试16位得分，饱和时自动换用32位，
+        # 开口和延伸罚分相同即等价于线性空位罚分
+        result = parasail.sw_trace_striped_sat(
+            query, reference, -gap_penalty, -gap_penalty, matrix)
+        # 没有正得分的局部比对时parasail返回哨兵负分和无效位置，
+        # 按Smith-Waterman的约定归一为空比对
+        if result.score <= 0:
+            return 0, (0, 0), "", ""
+        tb = result.traceback
+        return (int(result.score), (result.end_ref + 1, result.end_query + 1),
+                tb.ref, tb.query)
+
+    score, pos, traceback = smith_waterman(
+        reference, query, match_score, mismatch_penalty, gap_penalty)
+
+    # 回溯以获取匹配序列
+    i, j = pos
+    aligned_ref = ""
+    aligned_query = ""
+    while i > 0 and j > 0 and traceback[i][j] != TB_STOP:
+        if traceback[i][j] == TB_MATCH:
+            aligned_ref = reference[i-1] + aligned_ref
+            aligned_query = query[j-1] + aligned_query
+            i -= 1
+            j -= 1
+        elif traceback[i][j] == TB_DELETE:
+            aligned_ref = reference[i-1] + aligned_ref
+            aligned_query = '-' + aligned_query
+            i -= 1
+        elif traceback[i][j] == TB_INSERT:
+            aligned_ref = '-' + aligned_ref
+            aligned_query = query[j-1] + aligned_query
+            j -= 1
+        else:
+            break
+
+    return score, pos, aligned_ref, aligned_query
+
+def _occurrences_multi(text, patterns):
+    """一次扫描text，返回每个pattern到其全部出现位置（含重叠）的映射
+
+    pyahocorasick可用时构建多模式自动机，把N次单模式查找合并为
+    一次O(len(text)+总命中数)的线性扫描；否则退回逐个str.find。
+    """
+    positions = {pattern: [] for pattern in patterns}
+    if ahocorasick is not None and positions:
+        automaton = ahocorasick.Automaton()
+        for pattern in positions:
+            automaton.add_word(pattern, pattern)
+        automaton.make_automaton()
+        for end_index, pattern in automaton.iter(text):
+            positions[pattern].append(end_index - len(pattern) + 1)
+    else:
+        for pattern in positions:
             pos = 0
-            
-            # 在reference中查找匹配
             while True:
-                pos = reference.find(subseq, pos)
+                pos = text.find(pattern, pos)
                 if pos == -1:
                     break
-                positions.append(pos)
+                positions[pattern].append(pos)
                 pos += 1
-            
-            # 检查序列在reference中的出现次数
-            ref_positions = []
-            ref_pos = 0
-            while True:
-                ref_pos = reference.find(subseq, ref_pos)
-                if ref_pos == -1:
-                    break
-                ref_positions.append(ref_pos)
-                ref_pos += 1
-            
-            # 只要序列在reference中出现，且长度足够，就认为是重复序列
-            if len(ref_positions) >= 1 and len(subseq) >= min_length:
-                results.append({
-                    'sequence': subseq,
-                    'positions': positions,
-                    'count': len(positions),
-                    'reversed': False
-                })
-                # 添加到已处理序列集合中
-                unique_sequences.add(subseq)
-    
+    return positions
+
+def _collect_common_substrings_sa(reference, query, is_reversed, min_length, emitted, results):
+    """利用后缀数组+LCP数组枚举query与reference的全部公共子串
+
+    在reference + '#' + query的拼接串上构建后缀数组，
+    通过LCP区间（增强后缀数组）枚举所有既出现在query
+    又出现在reference中的不同子串，输出其在reference中的全部位置。
+
+    参数:
+        reference: 参考序列
+        query: 查询序列（正向或反向互补后的序列）
+        is_reversed: 是否为反向互补匹配
+        min_length: 最小子序列长度
+        emitted: 已输出序列的集合，用于正反两趟之间去重
+        results: 结果列表，元素为(结果字典, query中最小出现位置)元组
+    """
+    ref_len = len(reference)
+    text = (reference + '#' + query).encode('ascii')
+    n = len(text)
+
+    # 构建后缀数组和LCP数组（lcp[i]为SA[i]与SA[i+1]的最长公共前缀长度）
+    sa = divsufsort(text)
+    lcp = kasai(text, sa)
+
+    # 前缀和：统计SA前i个后缀中有多少个起点落在reference区域
+    is_ref = (sa < ref_len).astype(np.int64)
+    ref_prefix = np.concatenate(([0], np.cumsum(is_ref)))
+
+    def emit_interval(depth, lb, rb, parent_depth):
+        # LCP区间[lb, rb]对应一组出现位置相同的子串，长度范围为(parent_depth, depth]
+        ref_count = ref_prefix[rb + 1] - ref_prefix[lb]
+        query_count = (rb - lb + 1) - ref_count
+
+        # 只要序列同时出现在query和reference中，就认为是重复序列
+        if ref_count < 1 or query_count < 1:
+            return
+
+        # 长度下限受min_length约束，且忽略单个碱基
+        lo = max(parent_depth + 1, min_length, 2)
+        hi = depth
+        if lo > hi:
+            return
+
+        # 提取区间内的位置：reference中的全部位置和query中的最小位置
+        interval = sa[lb:rb + 1]
+        positions = sorted(int(p) for p in interval if p < ref_len)
+        min_q_pos = min(int(p) - ref_len - 1 for p in interval if p > ref_len)
+
+        for length in range(lo, hi + 1):
+            subseq = reference[positions[0]:positions[0] + length]
+            if subseq in emitted:
+                continue
+            results.append(({
+                'sequence': subseq,
+                'positions': positions,
+                'count': len(positions),
+                'reversed': is_reversed
+            }, min_q_pos))
+            emitted.add(subseq)
+
+    # 使用栈在一趟扫描中枚举所有LCP区间
+    stack = [(0, 0)]  # (lcp值, 区间左边界)
+    for i in range(1, n + 1):
+        lb = i - 1
+        cur = int(lcp[i - 1]) if i < n else 0
+        while cur < stack[-1][0]:
+            top_depth, top_lb = stack.pop()
+            emit_interval(top_depth, top_lb, i - 1, max(cur, stack[-1][0]))
+            lb = top_lb
+        if cur > stack[-1][0]:
+            stack.append((cur, lb))
+
+def _find_repeats_suffix_array(reference, query, min_length=1):
+    """基于后缀数组的find_repeats快速路径
+
+    与find_repeats语义相同，但用O(L log L)的后缀数组构建
+    加一趟线性LCP区间扫描替代O(L^3)的逐子串枚举。
+    """
+    emitted = set()
+    tagged_results = []
+
+    # 正向搜索
+    _collect_common_substrings_sa(reference, query, False, min_length, emitted, tagged_results)
+
     # 反向搜索
     query_rev = reverse_complement(query)
-    for i in range(len(query_rev) - min_length + 1):
-        for length in range(min_length, len(query_rev) - i + 1):
-            subseq = query_rev[i:i+length]
-            
-            # 忽略单个碱基的重复序列
-            if length == 1:
-                continue
-                
-            # 如果序列已经添加过，则跳过
-            if subseq in unique_sequences:
-                continue
-                
-            positions = []
-            pos = 0
-            
-            while True:
-                pos = reference.find(subseq, pos)
-                if pos == -1:
-                    break
-                positions.append(pos)
-                pos += 1
-            
-            # 检查序列在reference中的出现次数
-            ref_positions = []
-            ref_pos = 0
-            while True:
-                ref_pos = reference.find(subseq, ref_pos)
-                if ref_pos == -1:
+    _collect_common_substrings_sa(reference, query_rev, True, min_length, emitted, tagged_results)
+
+    # 按序列长度降序排序，等长时保持与逐子串扫描一致的顺序
+    # （正向在前，按query中首次出现位置升序）
+    tagged_results.sort(key=lambda x: (-len(x[0]['sequence']), x[0]['reversed'], x[1]))
+    return [r for r, _ in tagged_results]
+
+def find_repeats(reference, query, min_length=1):
+    """查找重复序列及其位置，忽略单个碱基的重复"""
+    # 当pydivsufsort可用时走后缀数组快速路径，结果与逐子串扫描一致
+    if divsufsort is not None:
+        return _find_repeats_suffix_array(reference, query, min_length)
+
+    results = []
+
+    # 用于跟踪已经添加的序列，避免重复输出
+    unique_sequences = set()
+
+    # 正向搜索和反向搜索共用同一套两阶段流程：
+    # 先枚举目标序列侧的不同子串作为候选，
+    # 再用一次多模式扫描批量获取所有候选在reference中的位置
+    for target, is_reversed in ((query, False), (reverse_complement(query), True)):
+        target_len = len(target)
+        candidates = []
+        for i in range(target_len - min_length + 1):
+            for length in range(min_length, target_len - i + 1):
+                subseq = target[i:i+length]
+
+                # 忽略单个碱基的重复序列
+                if length == 1:
+                    continue
+
+                # 如果序列已经添加过，则跳过
+                if subseq in unique_sequences:
+                    continue
+
+                # 单调性剪枝：长度L的子串不在reference中时，
+                # 其任何扩展也不可能出现，停止延长
+                if subseq not in reference:
                     break
-                ref_positions.append(ref_pos)
-                ref_pos += 1
-            
-            # 只要序列在reference中出现，且长度足够，就认为是重复序列
-            if len(ref_positions) >= 1 and len(subseq) >= min_length:
-                results.append({
-                    'sequence': subseq,
-                    'positions': positions,
-                    'count': len(positions),
-                    'reversed': True
-                })
+
+                candidates.append(subseq)
                 # 添加到已处理序列集合中
                 unique_sequences.add(subseq)
-    
+
+        # 一次Aho-Corasick扫描获取所有候选在reference中的出现位置
+        occurrences = _occurrences_multi(reference, candidates)
+        for subseq in candidates:
+            positions = occurrences[subseq]
+            results.append({
+                'sequence': subseq,
+                'positions': positions,
+                'count': len(positions),
+                'reversed': is_reversed
+            })
+
     # 按序列长度降序排序
     results.sort(key=lambda x: len(x['sequence']), reverse=True)
     return results
@@ -171,12 +698,23 @@ def visualize_matches(reference, query, repeats, figsize=(12, 10), alpha=0.5, po
     # 添加网格线
     ax.grid(True, linestyle='--', alpha=0.5)
     
-    # 绘制匹配点
-    forward_x = []
-    forward_y = []
-    reverse_x = []
-    reverse_y = []
-    
+    # 绘制匹配点：每个重复的坐标作为numpy数组块收集，最后一次性拼接，
+    # 避免在Python层逐点append
+    fwd_x_chunks = []
+    fwd_y_chunks = []
+    rev_x_chunks = []
+    rev_y_chunks = []
+
+    # 反向互补序列只需计算一次；find结果按子串缓存，避免重复全串扫描
+    query_rev = reverse_complement(query)
+    q_pos_fwd = {}
+    q_pos_rev = {}
+
+    # 线段先收集到列表，最后一次性创建LineCollection，
+    # 避免每条匹配线段各生成一个Line2D艺术家对象
+    fwd_segs = []
+    rev_segs = []
+
     # 收集正向和反向匹配的坐标
     for repeat in repeats:
         seq_len = len(repeat['sequence'])
@@ -184,47 +722,62 @@ def visualize_matches(reference, query, repeats, figsize=(12, 10), alpha=0.5, po
             if repeat['reversed']:
                 # 反向互补匹配 - 绿色
                 # 对于反向互补，我们需要找到query中的对应位置
-                query_rev = reverse_complement(query)
                 subseq = repeat['sequence']
-                q_pos = query_rev.find(subseq)
+                q_pos = repeat.get('q_pos')
+                if q_pos is None:
+                    q_pos = q_pos_rev.get(subseq)
+                if q_pos is None:
+                    q_pos = q_pos_rev[subseq] = query_rev.find(subseq)
                 if q_pos != -1:
                     # 只为较长的匹配添加线段，减少过度绘制
                     if seq_len > 10:  # 增加长度阈值，减少线段数量
                         # 添加线段
-                        ax.plot([pos, pos + seq_len - 1], [q_pos, q_pos + seq_len - 1], 'g-', linewidth=line_width, alpha=alpha)
+                        rev_segs.append([(pos, q_pos), (pos + seq_len - 1, q_pos + seq_len - 1)])
                     # 对于较短的序列，只添加端点，减少点的数量
                     if seq_len <= 10 or seq_len > 20:
-                        reverse_x.append(pos)
-                        reverse_y.append(q_pos)
-                        reverse_x.append(pos + seq_len - 1)
-                        reverse_y.append(q_pos + seq_len - 1)
+                        idx = np.array([0, seq_len - 1], dtype=np.int32)
                     else:
-                        # 对于中等长度的序列，添加更多点以保持可见性
-                        for i in range(0, seq_len, 2):  # 每隔2个碱基添加一个点
-                            reverse_x.append(pos + i)
-                            reverse_y.append(q_pos + i)
+                        # 对于中等长度的序列，添加更多点以保持可见性（每隔2个碱基一个点）
+                        idx = np.arange(0, seq_len, 2, dtype=np.int32)
+                    rev_x_chunks.append(pos + idx)
+                    rev_y_chunks.append(q_pos + idx)
             else:
                 # 正向匹配 - 红色
                 # 找到query中的对应位置
                 subseq = repeat['sequence']
-                q_pos = query.find(subseq)
+                # 结果自带query位置时（如SW比对结果）直接使用，跳过find
+                q_pos = repeat.get('q_pos')
+                if q_pos is None:
+                    q_pos = q_pos_fwd.get(subseq)
+                if q_pos is None:
+                    q_pos = q_pos_fwd[subseq] = query.find(subseq)
                 if q_pos != -1:
                     # 只为较长的匹配添加线段，减少过度绘制
                     if seq_len > 10:  # 增加长度阈值，减少线段数量
                         # 添加线段
-                        ax.plot([pos, pos + seq_len - 1], [q_pos, q_pos + seq_len - 1], 'r-', linewidth=line_width, alpha=alpha)
+                        fwd_segs.append([(pos, q_pos), (pos + seq_len - 1, q_pos + seq_len - 1)])
                     # 对于较短的序列，只添加端点，减少点的数量
                     if seq_len <= 10 or seq_len > 20:
-                        forward_x.append(pos)
-                        forward_y.append(q_pos)
-                        forward_x.append(pos + seq_len - 1)
-                        forward_y.append(q_pos + seq_len - 1)
+                        idx = np.array([0, seq_len - 1], dtype=np.int32)
                     else:
-                        # 对于中等长度的序列，添加更多点以保持可见性
-                        for i in range(0, seq_len, 2):  # 每隔2个碱基添加一个点
-                            forward_x.append(pos + i)
-                            forward_y.append(q_pos + i)
+                        # 对于中等长度的序列，添加更多点以保持可见性（每隔2个碱基一个点）
+                        idx = np.arange(0, seq_len, 2, dtype=np.int32)
+                    fwd_x_chunks.append(pos + idx)
+                    fwd_y_chunks.append(q_pos + idx)
     
+    # 将所有线段一次性加入两个LineCollection，整体只占两个艺术家对象
+    from matplotlib.collections import LineCollection
+    fwd_lines = LineCollection(fwd_segs, colors='red', linewidths=line_width, alpha=alpha)
+    rev_lines = LineCollection(rev_segs, colors='green', linewidths=line_width, alpha=alpha)
+    ax.add_collection(fwd_lines)
+    ax.add_collection(rev_lines)
+
+    # 在C层拼接所有坐标块
+    forward_x = np.concatenate(fwd_x_chunks) if fwd_x_chunks else np.empty(0, np.int32)
+    forward_y = np.concatenate(fwd_y_chunks) if fwd_y_chunks else np.empty(0, np.int32)
+    reverse_x = np.concatenate(rev_x_chunks) if rev_x_chunks else np.empty(0, np.int32)
+    reverse_y = np.concatenate(rev_y_chunks) if rev_y_chunks else np.empty(0, np.int32)
+
     # 绘制正向匹配点（红色）
     forward_scatter = ax.scatter(forward_x, forward_y, color='red', s=point_size, alpha=alpha, label='Forward')
     # 绘制反向互补匹配点（绿色）
@@ -245,24 +798,13 @@ def visualize_matches(reference, query, repeats, figsize=(12, 10), alpha=0.5, po
     legend_ax.text(0.2, 0.3, 'Reverse', verticalalignment='center')
     
     def update_visibility(label):
-        # 更新线段和点的可见性
-        if label == 'Both':
-            for line in ax.lines:
-                line.set_visible(True)
-            for dot in ax.collections:
-                dot.set_visible(True)
-        elif label == 'Forward':
-            # 显示正向匹配（红色）
-            for i, line in enumerate(ax.lines):
-                line.set_visible('r-' in str(line.get_color()))
-            ax.collections[0].set_visible(True)
-            ax.collections[1].set_visible(False)
-        elif label == 'Reverse':
-            # 显示反向互补匹配（绿色）
-            for i, line in enumerate(ax.lines):
-                line.set_visible('g-' in str(line.get_color()))
-            ax.collections[0].set_visible(False)
-            ax.collections[1].set_visible(True)
+        # 直接切换两组集合的可见性，无需遍历所有线段
+        show_fwd = label in ('Both', 'Forward')
+        show_rev = label in ('Both', 'Reverse')
+        fwd_lines.set_visible(show_fwd)
+        forward_scatter.set_visible(show_fwd)
+        rev_lines.set_visible(show_rev)
+        reverse_scatter.set_visible(show_rev)
         fig.canvas.draw_idle()
     
     radio.on_clicked(update_visibility)
@@ -280,12 +822,18 @@ def print_and_write(file, *args, **kwargs):
     if file:
         print(*args, **kwargs, file=file)
 
-def main(max_output=None):
+def main(max_output=None, align=None):
     # 获取输入序列
     file_path = input("请输入DNA序列文件路径（默认为'测试.txt'）：").strip()
     if not file_path:
         file_path = "测试.txt"
-    
+
+    # 如果未指定align，询问用户是否运行Smith-Waterman比对
+    # 比对是O(mn)的开销，且其结果只额外贡献一条重复记录，默认跳过
+    if align is None:
+        align_input = input("是否运行Smith-Waterman比对（y/N，默认跳过）：").strip().lower()
+        align = align_input in ('y', 'yes', '是')
+
     # 如果未指定max_output，询问用户
     if max_output is None:
         max_output_input = input("请输入要显示的重复序列数量（默认为全部显示）：").strip()
@@ -297,7 +845,7 @@ def main(max_output=None):
                 max_output = None
     
     # 创建输出文件
-    output_file = open("smith_waterman_results.txt", "w", encoding="utf-8")
+    output_file = open("smith_waterman_results.txt", "w", encoding="utf-8", buffering=1<<20)
     
     try:
         with open(file_path, 'r') as file:
@@ -332,43 +880,24 @@ def main(max_output=None):
         output_file.close()
         return
     
-    # 使用Smith-Waterman算法进行序列比对
-    score, pos, traceback = smith_waterman(reference, query)
-    
-    # 从Smith-Waterman算法的结果中提取匹配序列
-    i, j = pos
-    aligned_ref = ""
-    aligned_query = ""
-    
-    # 回溯以获取匹配序列
-    while i > 0 and j > 0 and traceback[i][j] is not None:
-        if traceback[i][j] == 'match':
-            aligned_ref = reference[i-1] + aligned_ref
-            aligned_query = query[j-1] + aligned_query
-            i -= 1
-            j -= 1
-        elif traceback[i][j] == 'delete':
-            aligned_ref = reference[i-1] + aligned_ref
-            aligned_query = '-' + aligned_query
-            i -= 1
-        elif traceback[i][j] == 'insert':
-            aligned_ref = '-' + aligned_ref
-            aligned_query = query[j-1] + aligned_query
-            j -= 1
-        else:
-            break
-    
-    # 创建一个包含Smith-Waterman结果的重复序列列表
     repeats = []
-    if aligned_ref and aligned_query and '-' not in aligned_ref and '-' not in aligned_query:
-        # 只有当没有插入或删除时，才添加到结果中
-        repeats.append({
-            'sequence': aligned_ref,
-            'positions': [pos[0] - len(aligned_ref)],
-            'count': 1,
-            'reversed': False
-        })
-    
+
+    # 仅在用户要求时运行Smith-Waterman比对，避免无谓的O(mn)计算
+    if align:
+        score, pos, aligned_ref, aligned_query = smith_waterman_alignment(reference, query)
+
+        if aligned_ref and aligned_query and '-' not in aligned_ref and '-' not in aligned_query:
+            # 只有当没有插入或删除时，才添加到结果中
+            # 起点由终点坐标减去比对长度直接得到，随结果一起传递，
+            # 可视化时无需再到query中find一遍
+            repeats.append({
+                'sequence': aligned_ref,
+                'positions': [pos[0] - len(aligned_ref)],
+                'count': 1,
+                'reversed': False,
+                'q_pos': pos[1] - len(aligned_query)
+            })
+
     # 查找其他重复序列
     additional_repeats = find_repeats(reference, query, min_length=10)
     repeats.extend(additional_repeats)
@@ -377,12 +906,23 @@ def main(max_output=None):
     print_and_write(output_file, "\n找到的重复序列：")
     # 根据max_output参数控制输出数量，如果为None则输出所有序列
     output_repeats = repeats if max_output is None else repeats[:max_output]
+    # 批量累积输出内容，每1000条记录合并写出一次，
+    # 避免每条记录多次print带来的格式化和系统调用开销
+    buf = []
     for i, repeat in enumerate(output_repeats):
-        print_and_write(output_file, f"序列: {repeat['sequence']} (长度: {len(repeat['sequence'])})")
-        print_and_write(output_file, f"位置: {repeat['positions']}")
-        print_and_write(output_file, f"重复次数: {repeat['count']}")
-        print_and_write(output_file, f"是否逆转: {'是' if repeat['reversed'] else '否'}")
-        print_and_write(output_file, "")
+        buf.append(f"序列: {repeat['sequence']} (长度: {len(repeat['sequence'])})\n"
+                   f"位置: {repeat['positions']}\n"
+                   f"重复次数: {repeat['count']}\n"
+                   f"是否逆转: {'是' if repeat['reversed'] else '否'}\n\n")
+        if len(buf) >= 1000:
+            chunk = ''.join(buf)
+            sys.stdout.write(chunk)
+            output_file.write(chunk)
+            buf.clear()
+    if buf:
+        chunk = ''.join(buf)
+        sys.stdout.write(chunk)
+        output_file.write(chunk)
     
     # 关闭输出文件
     output_file.close()
@@ -1,43 +1,421 @@
 import matplotlib.pyplot as plt
 import numpy as np
+from operator import itemgetter
+
+# 可选依赖：intervaltree用于O(log n)的包含关系查询，未安装时回退到线性扫描
+try:
+    from intervaltree import IntervalTree
+except ImportError:
+    IntervalTree = None
+
+# 可选依赖：numba把多项式哈希的逐字符循环编译为本地代码
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 可选依赖：pydivsufsort提供C实现的后缀数组构建（SA-IS算法），
+# 一次预处理替代逐长度的哈希扫描
+try:
+    from pydivsufsort import divsufsort, kasai
+except ImportError:
+    divsufsort = None
+    kasai = None
+
+# 碱基互补映射表，str.translate在C层一次完成整条序列的互补转换
+_RC_TABLE = str.maketrans('ACGTacgtN', 'TGCAtgcaN')
 
 def reverse_complement(sequence):
     """生成DNA序列的反向互补序列"""
-    complement = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
-    return ''.join(complement.get(base, base) for base in reversed(sequence))
+    return sequence.translate(_RC_TABLE)[::-1]
+
+# 模块级碱基映射表，按ord值直接索引，避免每次调用重建字典
+_BASE_VAL = [0] * 256
+for _c, _v in zip('ACGT', (1, 2, 3, 4)):
+    _BASE_VAL[ord(_c)] = _v
+
+# 同一映射的numpy版本，用于把整条序列一次编码为uint8数组
+_BASE_LUT = np.zeros(256, dtype=np.uint8)
+_BASE_LUT[np.frombuffer(b'ACGT', dtype=np.uint8)] = [1, 2, 3, 4]
+
+def _encode_bases(sequence):
+    """把序列编码为uint8数组（A/C/G/T→1..4，其他→0）"""
+    return _BASE_LUT[np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)]
+
+if njit is not None:
+    @njit(cache=True)
+    def _hash_kernel(arr, start, length):
+        """base=101、mod=10**9+7的多项式哈希核函数，uint64算术"""
+        h = np.uint64(0)
+        for i in range(start, start + length):
+            h = (h * np.uint64(101) + np.uint64(arr[i])) % np.uint64(1000000007)
+        return h
+
+    @njit(cache=True)
+    def _all_hashes_kernel(arr, length, base_num, mod):
+        """一次滚动扫描计算所有定长窗口的多项式哈希值
+
+        首个窗口的哈希和最高位幂各计算一次，其余窗口用滚动更新，
+        整条序列只做一遍C速度的线性扫描。
+        """
+        n = arr.shape[0] - length + 1
+        out = np.empty(n, np.int64)
+        h = np.int64(0)
+        for i in range(length):
+            h = (h * base_num + arr[i]) % mod
+        out[0] = h
+        high = np.int64(1)
+        for i in range(length - 1):
+            high = (high * base_num) % mod
+        for i in range(1, n):
+            h = ((h - arr[i-1] * high) % mod * base_num + arr[i+length-1]) % mod
+            if h < 0:
+                h += mod
+            out[i] = h
+        return out
+
+    @njit(cache=True)
+    def _prefix_hash_kernel(arr, base_num, mod):
+        """一次线性扫描计算前缀哈希数组"""
+        prefix = np.empty(arr.shape[0] + 1, np.int64)
+        prefix[0] = 0
+        h = np.int64(0)
+        for i in range(arr.shape[0]):
+            h = (h * base_num + arr[i]) % mod
+            prefix[i + 1] = h
+        return prefix
+else:
+    _hash_kernel = None
+    _all_hashes_kernel = None
+    _prefix_hash_kernel = None
 
 def hash_function(sequence, base_num=101, mod=10**9+7):
     """计算序列的哈希值
     使用简单的多项式哈希函数，适用于DNA序列
     优化版本：使用预计算的碱基映射和快速幂运算
+
+    numba可用且使用默认参数时，整条序列先编码为uint8数组，
+    再由编译后的核函数以C速度计算
     """
-    # 预计算碱基映射，避免重复字典查找
-    BASE_VAL = {'A': 1, 'C': 2, 'G': 3, 'T': 4}
-    
+    if _hash_kernel is not None and base_num == 101 and mod == 10**9 + 7:
+        return int(_hash_kernel(_encode_bases(sequence), 0, len(sequence)))
+
+    base_val = _BASE_VAL
     hash_val = 0
     for base in sequence:
         # 直接使用预计算的映射
-        base_val = BASE_VAL.get(base, 0)
-        hash_val = (hash_val * base_num + base_val) % mod
+        hash_val = (hash_val * base_num + base_val[ord(base)]) % mod
     return hash_val
 
-def rolling_hash(prev_hash, prev_char, next_char, length, base_num=101, mod=10**9+7):
+# 碱基到2-bit编码的映射表（A=00,C=01,G=10,T=11）
+_BASE2BIT = np.zeros(256, dtype=np.uint64)
+_BASE2BIT[np.frombuffer(b'ACGT', dtype=np.uint8)] = [0, 1, 2, 3]
+
+if njit is not None:
+    @njit(cache=True)
+    def _pack2bit_kernel(codes):
+        """把2-bit碱基编码打包进uint64字，每字32个碱基
+
+        碱基i占第i>>5个字的第2*(i&31)位起2位；结尾多留一个零字，
+        窗口提取时可以无条件读取相邻的下一个字。
+        """
+        n = codes.shape[0]
+        words = np.zeros((n + 31) // 32 + 1, np.uint64)
+        for i in range(n):
+            words[i >> 5] |= np.uint64(codes[i]) << np.uint64(2 * (i & 31))
+        return words
+
+    @njit(cache=True)
+    def _window_keys_kernel(words, n, k):
+        """从打包字中滑窗提取所有2k-bit整数键，每个窗口一次移位拼接"""
+        count = n - k + 1
+        out = np.empty(count, np.uint64)
+        mask = np.uint64(0xFFFFFFFFFFFFFFFF) >> np.uint64(64 - 2 * k)
+        for i in range(count):
+            off = np.uint64(2 * (i & 31))
+            key = words[i >> 5] >> off
+            if off != np.uint64(0):
+                key |= words[(i >> 5) + 1] << (np.uint64(64) - off)
+            out[i] = key & mask
+        return out
+else:
+    _pack2bit_kernel = None
+    _window_keys_kernel = None
+
+def _kmer_keys(sequence, k):
+    """计算sequence中所有长度为k的子串的2-bit打包整数键
+
+    每个子串打包为一个uint64（要求k<=32）；键相等即子串相等，
+    无需取模、幂运算或额外验证。numba可用时先把整条序列打包成
+    每字32碱基的uint64数组，每个窗口只做一次移位拼接提取；
+    否则用k趟向量化移位或运算逐位拼出键。
+    """
+    codes = _BASE2BIT[np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)]
+    if _pack2bit_kernel is not None:
+        return _window_keys_kernel(_pack2bit_kernel(codes), codes.shape[0], k)
+
+    n = codes.shape[0] - k + 1
+    keys = np.zeros(n, dtype=np.uint64)
+    for i in range(k):
+        keys = (keys << np.uint64(2)) | codes[i:i+n]
+    return keys
+
+def rolling_hash(prev_hash, prev_char, next_char, length, base_num=101, mod=10**9+7, high=None):
     """计算滚动哈希值，用于快速更新子序列的哈希值
     优化版本：使用预计算的碱基映射和幂值
+
+    high为base_num^(length-1) % mod；length在循环内不变，
+    调用方预计算一次传入可省去每次调用的模幂运算
     """
-    # 预计算碱基映射，避免重复字典查找
-    BASE_VAL = {'A': 1, 'C': 2, 'G': 3, 'T': 4}
-    
-    # 直接使用预计算的映射
-    prev_val = BASE_VAL.get(prev_char, 0)
-    next_val = BASE_VAL.get(next_char, 0)
-    
+    # 直接使用模块级的预计算映射
+    prev_val = _BASE_VAL[ord(prev_char)]
+    next_val = _BASE_VAL[ord(next_char)]
+
     # 使用预计算的幂值
-    highest_digit_val = (prev_val * pow(base_num, length-1, mod)) % mod
-    
+    if high is None:
+        high = pow(base_num, length-1, mod)
+    highest_digit_val = (prev_val * high) % mod
+
     # 移除最高位的贡献并添加新字符的贡献
     return ((prev_hash - highest_digit_val + mod) * base_num + next_val) % mod
 
+def _hash_powers(max_length, base_num, mod):
+    """预计算base_num的0..max_length次幂（模mod）"""
+    powers = np.empty(max_length + 1, np.int64)
+    powers[0] = 1
+    for i in range(1, max_length + 1):
+        powers[i] = powers[i - 1] * base_num % mod
+    return powers
+
+def _prefix_hashes(sequence, base_num, mod):
+    """计算前缀哈希数组P，P[i]为序列前i个碱基的多项式哈希
+
+    任意窗口的哈希都能由P经substring_hash以O(1)推出，
+    整条序列只需扫描一次即可服务所有长度
+    """
+    codes = _encode_bases(sequence).astype(np.int64)
+    if _prefix_hash_kernel is not None:
+        return _prefix_hash_kernel(codes, base_num, mod)
+    prefix = np.empty(codes.shape[0] + 1, np.int64)
+    prefix[0] = 0
+    h = 0
+    for i in range(codes.shape[0]):
+        h = (h * base_num + int(codes[i])) % mod
+        prefix[i + 1] = h
+    return prefix
+
+def substring_hash(prefix, powers, start, length, mod):
+    """由前缀哈希O(1)求出窗口[start, start+length)的多项式哈希"""
+    return int((prefix[start + length] - prefix[start] * powers[length]) % mod)
+
+def _window_hashes(prefix, powers, length, mod):
+    """由前缀哈希一次推出全部定长窗口的哈希值
+
+    P[i+length] - P[i]*B^length在C层整段计算，
+    每个长度不再重新扫描序列本身
+    """
+    return (prefix[length:] - prefix[:-length] * powers[length]) % mod
+
+def _group_by_key(keys):
+    """把键数组按值分组为{键: 位置列表}，不在Python层逐元素操作字典
+
+    stable argsort把相同键聚到一起，再按相邻差异切出每组的边界；
+    组内位置天然升序，组按首次出现位置排序，
+    与逐位置插入字典得到的顺序完全一致。
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    starts = np.concatenate((np.zeros(1, np.int64), boundaries))
+    ends = np.concatenate((boundaries, np.array([sorted_keys.shape[0]], np.int64)))
+
+    hash_map = {}
+    for g in np.argsort(order[starts], kind='stable'):
+        s = starts[g]
+        hash_map[int(sorted_keys[s])] = order[s:ends[g]].tolist()
+    return hash_map
+
+def _build_hash_map(sequence, length, base_num, mod, prefix=None, powers=None):
+    """构建sequence中所有定长子串的哈希值到起始位置列表的映射
+
+    length<=32时使用2-bit打包的uint64键代替多项式哈希；
+    调用方传入前缀哈希数组时由其直接推出全部窗口哈希，
+    否则退回逐位置的滚动多项式哈希。
+    分组用argsort批量完成，避免每个位置一次字典查找。
+    """
+    hash_map = {}
+    seq_len = len(sequence)
+    if seq_len < length:
+        return hash_map
+
+    if length <= 32:
+        return _group_by_key(_kmer_keys(sequence, length))
+
+    if prefix is not None:
+        # 前缀哈希路径：同一前缀数组服务所有长度，无需重新扫描序列
+        return _group_by_key(_window_hashes(prefix, powers, length, mod))
+
+    if _all_hashes_kernel is not None:
+        # 单次核函数调用得到全部窗口哈希，替代逐位置的Python滚动更新
+        return _group_by_key(_all_hashes_kernel(_encode_bases(sequence), length, base_num, mod))
+
+    curr_hash = hash_function(sequence[:length], base_num, mod)
+    if curr_hash not in hash_map:
+        hash_map[curr_hash] = []
+    hash_map[curr_hash].append(0)
+
+    # 使用滚动哈希计算其余子序列的哈希值，最高位幂值只计算一次
+    high = pow(base_num, length - 1, mod)
+    for i in range(1, seq_len - length + 1):
+        curr_hash = rolling_hash(curr_hash, sequence[i-1], sequence[i+length-1], length, base_num, mod, high)
+        if curr_hash not in hash_map:
+            hash_map[curr_hash] = []
+        hash_map[curr_hash].append(i)
+    return hash_map
+
+def _collect_repeats_sa(reference, query, min_length, max_length, emissions):
+    """利用后缀数组+LCP数组枚举满足条件的(长度, ref位置, query位置列表)
+
+    在reference + '#' + query的拼接串上构建后缀数组，
+    通过LCP区间枚举所有不同子串的出现位置集合，
+    收集在reference中仅出现一次、在query中出现至少两次的子串。
+    """
+    ref_len = len(reference)
+    text = (reference + '#' + query).encode('ascii')
+    n = len(text)
+
+    # 构建后缀数组和LCP数组（lcp[i]为SA[i]与SA[i+1]的最长公共前缀长度）
+    sa = divsufsort(text)
+    lcp = kasai(text, sa)
+
+    # 前缀和：统计SA前i个后缀中有多少个起点落在reference区域
+    is_ref = (sa < ref_len).astype(np.int64)
+    ref_prefix = np.concatenate(([0], np.cumsum(is_ref)))
+
+    def emit_interval(depth, lb, rb, parent_depth):
+        # LCP区间[lb, rb]对应一组出现位置相同的子串，长度范围为(parent_depth, depth]
+        ref_count = ref_prefix[rb + 1] - ref_prefix[lb]
+        query_count = rb - lb + 1 - ref_count
+
+        # 只有当序列在reference中仅出现一次，但在query中出现多次时，才认为是重复序列
+        if ref_count != 1 or query_count < 2:
+            return
+
+        # 长度范围受min_length/max_length约束，且忽略单个碱基
+        lo = max(parent_depth + 1, min_length, 2)
+        hi = min(depth, max_length)
+        if lo > hi:
+            return
+
+        interval = sa[lb:rb + 1]
+        ref_pos = int(interval[is_ref[lb:rb + 1] == 1][0])
+        query_positions = sorted(int(p) - ref_len - 1 for p in interval if p > ref_len)
+        for length in range(lo, hi + 1):
+            emissions.append((length, ref_pos, query_positions))
+
+    # 使用栈在一趟扫描中枚举所有LCP区间
+    stack = [(0, 0)]  # (lcp值, 区间左边界)
+    for i in range(1, n + 1):
+        lb = i - 1
+        cur = int(lcp[i - 1]) if i < n else 0
+        while cur < stack[-1][0]:
+            top_depth, top_lb = stack.pop()
+            emit_interval(top_depth, top_lb, i - 1, max(cur, stack[-1][0]))
+            lb = top_lb
+        if cur > stack[-1][0]:
+            stack.append((cur, lb))
+
+def _match_length(seq_a, pos_a, seq_b, pos_b):
+    """计算两条序列从给定位置开始的最大公共前缀长度"""
+    n = 0
+    len_a = len(seq_a)
+    len_b = len(seq_b)
+    while pos_a + n < len_a and pos_b + n < len_b and seq_a[pos_a + n] == seq_b[pos_b + n]:
+        n += 1
+    return n
+
+def find_tandem_repeats(reference, query, min_length=2, max_length=None):
+    """检测query中的串联重复：同一子串首尾相接连续出现两次以上
+
+    不按长度逐一重建哈希表，而是对每个周期p只考察p的整数倍锚点，
+    在锚点处向两侧直接延伸判断是否构成周期为p的连续重复，
+    整体代价约为O(n·H(max_length))而非O(max_length·n)的全量重散列。
+    候选子串仍按模块的约定核对：在reference中仅出现一次才输出；
+    同一子串的多段重复合并为一条结果，query_positions汇总全部出现位置。
+
+    参数:
+        reference: 参考序列
+        query: 查询序列
+        min_length: 最小周期长度
+        max_length: 最大周期长度，如果为None则使用len(query)//2
+    """
+    n = len(query)
+    if max_length is None:
+        max_length = n // 2
+    else:
+        max_length = min(max_length, n // 2)
+
+    results = []
+    results_by_seq = {}
+    positions_index = {}
+    seen_runs = set()
+    ref_pos_cache = {}
+    motif_positions = {}  # 子串 -> (ref位置, query位置集合)，跨多段重复汇总
+    for period in range(max(min_length, 2), max_length + 1):
+        for anchor in range(period, n, period):
+            # 锚点两侧的后向/前向延伸：两侧合计达到period，
+            # 锚点附近就存在周期为period的连续重复
+            backward = 0
+            while (anchor - period - 1 - backward >= 0
+                   and query[anchor - period - 1 - backward] == query[anchor - 1 - backward]):
+                backward += 1
+            forward = _match_length(query, anchor - period, query, anchor)
+            if backward + forward < period:
+                continue
+
+            # 周期区域的起点由后向延伸唯一确定，同一区域只处理一次
+            start = anchor - period - backward
+            if (start, period) in seen_runs:
+                continue
+            seen_runs.add((start, period))
+
+            # 区域总长决定各相位子串能完整连续出现的次数
+            region_len = period + _match_length(query, start, query, start + period)
+
+            # 同一区域内各相位的旋转子串只要完整出现两次也分别记录
+            for shift in range(period):
+                copies = (region_len - shift) // period
+                if copies < 2:
+                    break  # copies随shift单调不增，后续相位不会再满足
+
+                # 只有当序列在reference中仅出现一次（含重叠）时才认为是重复变异
+                run_start = start + shift
+                subseq = query[run_start:run_start + period]
+                if subseq not in ref_pos_cache:
+                    ref_pos = reference.find(subseq)
+                    if ref_pos != -1 and reference.find(subseq, ref_pos + 1) != -1:
+                        ref_pos = -1
+                    ref_pos_cache[subseq] = ref_pos
+                ref_pos = ref_pos_cache[subseq]
+                if ref_pos == -1:
+                    continue
+
+                # 同一子串可能出现多段重复，位置合并后统一输出一条结果
+                if subseq not in motif_positions:
+                    motif_positions[subseq] = (ref_pos, set())
+                motif_positions[subseq][1].update(run_start + i * period for i in range(copies))
+
+    for subseq, (ref_pos, positions) in motif_positions.items():
+        query_positions = sorted(positions)
+        add_repeat_result(results, subseq, [ref_pos],
+                          query_positions, False, len(query_positions) - 1, len(subseq),
+                          results_by_seq=results_by_seq,
+                          positions_index=positions_index)
+
+    # 按序列长度降序排序
+    results.sort(key=itemgetter('length'), reverse=True)
+    return results
+
 def find_repeats_hash_dp(reference, query, min_length=1, max_length=None, use_parallel=True):
     """使用哈希和动态规划方法查找重复序列及其位置，忽略单个碱基的重复
     优化版本：添加提前终止条件和并行处理支持
@@ -60,9 +438,8 @@ def find_repeats_hash_dp(reference, query, min_length=1, max_length=None, use_pa
         max_length: 最大子序列长度，如果为None则使用两个序列的最小长度
         use_parallel: 是否使用并行处理
     """
-    # 用于跟踪已经添加的序列，避免重复输出
-    unique_sequences = set()
     import concurrent.futures
+    import os
     import time
     
     results = []
@@ -82,36 +459,43 @@ def find_repeats_hash_dp(reference, query, min_length=1, max_length=None, use_pa
     start_time = time.time()
     
     # 使用并行处理同时处理正向和反向序列
-    if use_parallel and max_length > 20:  # 只有当序列足够长时才使用并行
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+    # 工作量按ref_len*query_len估算，足够大且有多核时才值得承担进程池的启动开销
+    if use_parallel and ref_len * query_len > 10_000_000 and (os.cpu_count() or 1) > 1:
+        # 进程池绕过GIL，两趟CPU密集的扫描在独立解释器中真正并行
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
             # 提交正向序列处理任务
             forward_future = executor.submit(
-                process_sequence, reference, query, False, [], min_length, max_length, unique_sequences
+                process_sequence, reference, query, False, None, min_length, max_length
             )
-            
+
             # 提交反向互补序列处理任务
             query_rev = reverse_complement(query)
             reverse_future = executor.submit(
-                process_sequence, reference, query_rev, True, [], min_length, max_length, unique_sequences
+                process_sequence, reference, query_rev, True, None, min_length, max_length
             )
-            
-            # 获取结果
-            forward_results = forward_future.result()
-            reverse_results = reverse_future.result()
-            
+
             # 合并结果
-            results.extend(forward_results)
-            results.extend(reverse_results)
+            results.extend(forward_future.result())
+            results.extend(reverse_future.result())
     else:
         # 处理正向序列
-        process_sequence(reference, query, False, results, min_length, max_length, unique_sequences)
-        
+        process_sequence(reference, query, False, results, min_length, max_length)
+
         # 处理反向互补序列
         query_rev = reverse_complement(query)
-        process_sequence(reference, query_rev, True, results, min_length, max_length, unique_sequences)
-    
+        process_sequence(reference, query_rev, True, results, min_length, max_length)
+
+    # 合并后统一去重：同一(序列, 方向)只保留repeat_count最大的结果，
+    # 去重成本为O(R)，扫描过程中不再需要共享集合
+    seen = {}
+    for result in results:
+        key = (result['sequence'], result['reversed'])
+        if key not in seen or result['repeat_count'] > seen[key]['repeat_count']:
+            seen[key] = result
+    results = list(seen.values())
+
     # 按序列长度降序排序
-    results.sort(key=lambda x: len(x['sequence']), reverse=True)
+    results.sort(key=itemgetter('length'), reverse=True)
     
     end_time = time.time()
     # 这里不使用print_and_write，因为这个函数在main函数外被调用，没有output_file参数
@@ -119,7 +503,7 @@ def find_repeats_hash_dp(reference, query, min_length=1, max_length=None, use_pa
     
     return results
 
-def process_sequence(reference, query, is_reversed, results, min_length, max_length=None, unique_sequences=None):
+def process_sequence(reference, query, is_reversed, results, min_length, max_length=None):
     """处理序列查找重复子序列
     优化版本：使用滚动哈希和更高效的数据结构
     
@@ -136,11 +520,25 @@ def process_sequence(reference, query, is_reversed, results, min_length, max_len
         results: 结果列表
         min_length: 最小子序列长度
         max_length: 最大子序列长度
-        unique_sequences: 用于跟踪已处理序列的集合，避免重复输出
     """
     # 创建本地结果列表，支持并行处理
     local_results = [] if results is None else results
-    
+
+    # 本次遍历已输出结果的reference区间树，用于快速判断包含关系
+    emitted_intervals = IntervalTree() if IntervalTree is not None else None
+
+    # 序列和位置两个索引使去重与包含检查摆脱对结果列表的线性扫描，
+    # 串行路径两趟共享同一结果列表，索引需从已有结果初始化
+    results_by_seq = {}
+    positions_index = {}
+    for result in local_results:
+        results_by_seq[(result['sequence'], result['reversed'])] = result
+        entry = (len(result['sequence']), frozenset(result['ref_positions']))
+        for p in result['ref_positions']:
+            if (result['reversed'], p) not in positions_index:
+                positions_index[(result['reversed'], p)] = []
+            positions_index[(result['reversed'], p)].append(entry)
+
     ref_len = len(reference)
     query_len = len(query)
     base_num = 101
@@ -152,108 +550,148 @@ def process_sequence(reference, query, is_reversed, results, min_length, max_len
     else:
         max_length = min(max_length, ref_len, query_len)
     
-    # 预计算幂值，避免重复计算
-    powers = [1]
-    for i in range(1, max(ref_len, query_len)):
-        powers.append((powers[-1] * base_num) % mod)
-    
-    # 为reference中所有可能的子序列创建哈希表
-    ref_hash_map = {}
-    
-    # 对于每个可能的子序列长度
+    # 后缀数组路径：一次O(n)预处理枚举全部满足条件的(子串, 长度)对，
+    # 完全省去逐长度扫描和种子延伸
+    if divsufsort is not None and ref_len > 0 and query_len > 0:
+        emissions = []
+        _collect_repeats_sa(reference, query, min_length, max_length, emissions)
+        # 与逐长度扫描相同的输出顺序：长度从小到大，同长度按ref位置
+        emissions.sort(key=itemgetter(0, 1))
+
+        prev_length = 0
+        for length, ref_pos, query_positions in emissions:
+            # 保留原有的提前终止行为，仅在长度切换时检查
+            if length != prev_length:
+                if len(local_results) > 100 and length < min_length + 5:
+                    break
+                prev_length = length
+            add_repeat_result(local_results, reference[ref_pos:ref_pos+length], [ref_pos],
+                              query_positions, is_reversed, len(query_positions) - 1,
+                              length, emitted_intervals, results_by_seq, positions_index)
+        return local_results
+
+    # 种子定位+贪心延伸：只在种子长度构建一次哈希表，之后按字符直接延伸，
+    # 避免每个长度都重建reference和query的完整哈希表
+    seed_len = max(min_length, 2)
+    if seed_len <= 32 and ref_len >= seed_len and query_len >= seed_len:
+        ref_map = _build_hash_map(reference, seed_len, base_num, mod)
+        query_map = _build_hash_map(query, seed_len, base_num, mod)
+
+        # 对每个种子位置做贪心延伸，得到可接受的长度区间
+        candidates = []
+        for hash_val, ref_positions in ref_map.items():
+            query_seed_positions = query_map.get(hash_val)
+            if query_seed_positions is None:
+                continue
+            for ref_pos in ref_positions:
+                # 与其他共享种子的reference位置的最大公共前缀，决定唯一性下限：
+                # 长度超过该值后子序列在reference中仅出现一次
+                ref_ext = 0
+                for other_pos in ref_positions:
+                    if other_pos == ref_pos:
+                        continue
+                    ext = _match_length(reference, other_pos, reference, ref_pos)
+                    if ext > ref_ext:
+                        ref_ext = ext
+
+                # 与query中每个种子位置的最大公共前缀，第二大值决定出现多次的上限
+                query_exts = [(query_pos, _match_length(reference, ref_pos, query, query_pos))
+                              for query_pos in query_seed_positions]
+                sorted_exts = sorted((ext for _, ext in query_exts), reverse=True)
+                if len(sorted_exts) < 2:
+                    continue
+                low = max(seed_len, ref_ext + 1)
+                high = min(sorted_exts[1], max_length)
+                if low <= high:
+                    candidates.append((ref_pos, low, high, query_exts))
+
+        # 按reference位置排序，保持与逐长度扫描一致的输出顺序
+        candidates.sort(key=itemgetter(0))
+
+        # 按长度从小到大输出，保留原有的提前终止行为
+        for length in range(seed_len, max_length + 1):
+            if len(local_results) > 100 and length < min_length + 5:
+                break
+            for ref_pos, low, high, query_exts in candidates:
+                if low <= length <= high:
+                    ref_subseq = reference[ref_pos:ref_pos+length]
+                    query_positions = [query_pos for query_pos, ext in query_exts if ext >= length]
+                    repeat_count = len(query_positions) - 1
+                    add_repeat_result(local_results, ref_subseq, [ref_pos], query_positions, is_reversed, repeat_count, length, emitted_intervals, results_by_seq, positions_index)
+
+        return local_results
+
+    # 回退路径：最小长度超出打包键范围时仍按长度逐一扫描
+    # 原始字节数组用于验证比较，按行的批量比较在C层以memcmp完成
+    ref_bytes = np.frombuffer(reference.encode('ascii'), dtype=np.uint8)
+    query_bytes = np.frombuffer(query.encode('ascii'), dtype=np.uint8)
+
+    # 前缀哈希只对每条序列计算一次，所有长度的窗口哈希由其O(1)推出
+    hash_powers = _hash_powers(max_length, base_num, mod)
+    ref_prefix_hashes = _prefix_hashes(reference, base_num, mod)
+    query_prefix_hashes = _prefix_hashes(query, base_num, mod)
     for length in range(min_length, max_length + 1):
         # 忽略单个碱基的重复序列
         if length == 1:
             continue
-            
+
         # 提前终止条件：如果已经找到足够多的长序列，可以跳过短序列
         if len(local_results) > 100 and length < min_length + 5:
             break
-            
-        # 重置哈希表，只存储当前长度的子序列
-        ref_hash_map.clear()
-        
-        # 计算reference中所有子序列的哈希值
-        if ref_len >= length:
-            curr_hash = hash_function(reference[:length], base_num, mod)
-            
-            if curr_hash not in ref_hash_map:
-                ref_hash_map[curr_hash] = []
-            ref_hash_map[curr_hash].append(0)
-            
-            # 使用滚动哈希计算其余子序列的哈希值
-            for i in range(1, ref_len - length + 1):
-                # 使用滚动哈希更新哈希值
-                curr_hash = rolling_hash(curr_hash, reference[i-1], reference[i+length-1], length, base_num, mod)
-                
-                if curr_hash not in ref_hash_map:
-                    ref_hash_map[curr_hash] = []
-                ref_hash_map[curr_hash].append(i)
-        
+
+        # 计算reference中所有子序列的哈希值（长度<=32时为2-bit打包键）
+        ref_hash_map = _build_hash_map(reference, length, base_num, mod,
+                                       ref_prefix_hashes, hash_powers)
+
         # 计算query中所有子序列的哈希值并查找重复
         if query_len >= length:
             # 创建查询序列的哈希表，用于查找连续重复
-            query_hash_map = {}
-            
-            # 计算query中第一个子序列的哈希值
-            curr_hash = hash_function(query[:length], base_num, mod)
-            
-            # 将哈希值添加到查询哈希表
-            if curr_hash not in query_hash_map:
-                query_hash_map[curr_hash] = []
-            query_hash_map[curr_hash].append(0)
-            
-            # 使用滚动哈希计算其余子序列的哈希值
-            for i in range(1, query_len - length + 1):
-                # 使用滚动哈希更新哈希值
-                curr_hash = rolling_hash(curr_hash, query[i-1], query[i+length-1], length, base_num, mod)
-                
-                # 将哈希值添加到查询哈希表
-                if curr_hash not in query_hash_map:
-                    query_hash_map[curr_hash] = []
-                query_hash_map[curr_hash].append(i)
-            
-            # 对于reference中的每个子序列，检查在query中是否有重复
-            for hash_val, ref_positions in ref_hash_map.items():
-                if hash_val in query_hash_map:
-                    # 验证实际序列
-                    for ref_pos in ref_positions:
-                        ref_subseq = reference[ref_pos:ref_pos+length]
-                        
-                        # 如果序列已经处理过，则跳过
-                        if unique_sequences is not None and ref_subseq in unique_sequences:
-                            continue
-                            
-                        query_positions = []
-                        
-                        # 查找query中所有匹配的位置
-                        for query_pos in query_hash_map[hash_val]:
-                            query_subseq = query[query_pos:query_pos+length]
-                            if ref_subseq == query_subseq:
-                                query_positions.append(query_pos)
-                        
-                        # 检查序列在reference中的出现次数
-                        ref_all_positions = []
-                        ref_check_pos = 0
-                        while True:
-                            ref_check_pos = reference.find(ref_subseq, ref_check_pos)
-                            if ref_check_pos == -1:
-                                break
-                            ref_all_positions.append(ref_check_pos)
-                            ref_check_pos += 1
-                        
-                        # 只有当序列在reference中仅出现一次，但在query中出现多次时，才认为是重复序列
-                        if len(ref_all_positions) == 1 and len(query_positions) > 1:
-                            # 计算额外重复次数（减去在reference中对应的一次出现）
-                            repeat_count = len(query_positions) - 1
-                            
-                            # 添加重复结果
-                            add_repeat_result(local_results, ref_subseq, [ref_pos], query_positions, is_reversed, repeat_count, length)
-                            
-                            # 将序列添加到已处理集合中
-                            if unique_sequences is not None:
-                                unique_sequences.add(ref_subseq)
-    
+            query_hash_map = _build_hash_map(query, length, base_num, mod,
+                                             query_prefix_hashes, hash_powers)
+
+            # 两张表的公共哈希键用numpy求交集，代替逐键的Python字典探测；
+            # 再按首个ref位置排序，保持与逐键遍历一致的输出顺序
+            common_keys = np.intersect1d(
+                np.fromiter(ref_hash_map.keys(), np.uint64, len(ref_hash_map)),
+                np.fromiter(query_hash_map.keys(), np.uint64, len(query_hash_map)))
+            common_keys = sorted((int(h) for h in common_keys),
+                                 key=lambda h: ref_hash_map[h][0])
+
+            # query所有定长窗口的只读视图，验证时按行批量比较
+            query_windows = np.lib.stride_tricks.sliding_window_view(query_bytes, length)
+
+            # 对于reference中的每个公共子序列，检查在query中是否有重复
+            for hash_val in common_keys:
+                # 验证实际序列
+                for ref_pos in ref_hash_map[hash_val]:
+                    ref_subseq = reference[ref_pos:ref_pos+length]
+                    ref_seg = ref_bytes[ref_pos:ref_pos+length]
+
+                    # 候选窗口堆成2D数组后一次性按行比较，
+                    # 代替逐个位置的字符串切片比较
+                    candidate_positions = query_hash_map[hash_val]
+                    matches = (query_windows[candidate_positions] == ref_seg).all(axis=1)
+                    query_positions = [query_pos for query_pos, ok
+                                      in zip(candidate_positions, matches) if ok]
+
+                    # 检查序列在reference中的出现次数
+                    ref_all_positions = []
+                    ref_check_pos = 0
+                    while True:
+                        ref_check_pos = reference.find(ref_subseq, ref_check_pos)
+                        if ref_check_pos == -1:
+                            break
+                        ref_all_positions.append(ref_check_pos)
+                        ref_check_pos += 1
+
+                    # 只有当序列在reference中仅出现一次，但在query中出现多次时，才认为是重复序列
+                    if len(ref_all_positions) == 1 and len(query_positions) > 1:
+                        # 计算额外重复次数（减去在reference中对应的一次出现）
+                        repeat_count = len(query_positions) - 1
+
+                        # 添加重复结果
+                        add_repeat_result(local_results, ref_subseq, [ref_pos], query_positions, is_reversed, repeat_count, length, emitted_intervals, results_by_seq, positions_index)
+
     # 返回结果，支持并行处理
     return local_results
 
@@ -276,9 +714,9 @@ def add_result_if_not_contained(results, subseq, positions, is_reversed, length)
             'reversed': is_reversed
         })
 
-def add_repeat_result(results, subseq, ref_positions, query_positions, is_reversed, repeat_count, length):
+def add_repeat_result(results, subseq, ref_positions, query_positions, is_reversed, repeat_count, length, emitted_intervals=None, results_by_seq=None, positions_index=None):
     """添加重复变异结果
-    
+
     参数:
         results: 结果列表
         subseq: 重复序列
@@ -287,30 +725,70 @@ def add_repeat_result(results, subseq, ref_positions, query_positions, is_revers
         is_reversed: 是否为反向重复
         repeat_count: 重复次数（额外出现的次数）
         length: 序列长度
+        emitted_intervals: 已输出结果在reference上的区间树，用于快速包含关系查询
+        results_by_seq: (序列, is_reversed)到结果的索引，去重查询为O(1)
+        positions_index: (is_reversed, 位置)到已输出(长度, 位置集合)的索引
     """
-    # 检查是否已经有相同序列的结果
-    for result in results:
-        if result['sequence'] == subseq:
+    # 检查是否已经有相同序列、相同方向的结果；
+    # 方向计入键，串行与并行路径对正反两个方向保留相同的结果集
+    if results_by_seq is not None:
+        if (subseq, is_reversed) in results_by_seq:
             # 序列已存在，不再添加
             return
-    
+    else:
+        for result in results:
+            if result['sequence'] == subseq and result['reversed'] == is_reversed:
+                # 序列已存在，不再添加
+                return
+
     # 检查是否已经有更长的序列包含了这个子序列
     is_contained = False
-    for result in results:
-        if (result['reversed'] == is_reversed and 
-            len(result['sequence']) > length and 
-            all(p in result['ref_positions'] for p in ref_positions)):
-            is_contained = True
-            break
-    
+    if emitted_intervals is not None:
+        # 区间树路径：每个位置都被某个更长的已输出区间覆盖才算被包含
+        is_contained = all(
+            any(iv.begin <= p and iv.end >= p + length and iv.end - iv.begin > length
+                for iv in emitted_intervals.overlap(p, p + length))
+            for p in ref_positions)
+    elif positions_index is not None:
+        # 位置索引路径：候选结果必然覆盖首个位置，只需检查对应索引项
+        for prev_length, prev_positions in positions_index.get((is_reversed, ref_positions[0]), ()):
+            if prev_length > length and all(p in prev_positions for p in ref_positions):
+                is_contained = True
+                break
+    else:
+        for result in results:
+            if (result['reversed'] == is_reversed and
+                len(result['sequence']) > length and
+                all(p in result['ref_positions'] for p in ref_positions)):
+                is_contained = True
+                break
+
     if not is_contained:
-        results.append({
+        if emitted_intervals is not None:
+            for p in ref_positions:
+                emitted_intervals.addi(p, p + length)
+        if positions_index is not None:
+            # 位置集合转为frozenset，包含检查中的成员判断为O(1)
+            entry = (length, frozenset(ref_positions))
+            for p in ref_positions:
+                if (is_reversed, p) not in positions_index:
+                    positions_index[(is_reversed, p)] = []
+                positions_index[(is_reversed, p)].append(entry)
+        result = {
             'sequence': subseq,
             'ref_positions': ref_positions,  # reference中的位置
             'query_positions': query_positions,  # query中的位置
             'repeat_count': repeat_count,  # 额外重复的次数
+            'length': length,  # 序列长度，排序键直接取字段，无需重复计算
             'reversed': is_reversed
-        })
+        }
+        if results_by_seq is not None:
+            results_by_seq[(subseq, is_reversed)] = result
+        results.append(result)
+
+# 可视化用的结构化数组字段（SoA布局），每行对应一个(ref位置, query位置)匹配对
+_RES_DTYPE = np.dtype([('ref_pos', 'i4'), ('query_pos', 'i4'), ('length', 'i4'),
+                       ('repeat_count', 'i2'), ('reversed', '?')])
 
 def visualize_matches(reference, query, repeats, figsize=(12, 10), alpha=0.5, point_size=3, line_width=1.0):
     """可视化匹配结果，包括正向重复和反向重复变异
@@ -335,109 +813,152 @@ def visualize_matches(reference, query, repeats, figsize=(12, 10), alpha=0.5, po
     # 添加网格线
     ax.grid(True, linestyle='--', alpha=0.5)
     
-    # 绘制匹配点
-    forward_x = []
-    forward_y = []
-    reverse_x = []
-    reverse_y = []
-    
-    # 收集正向和反向匹配的坐标
+    # 绘制匹配点：坐标按numpy数组块收集，最后一次性拼接
+    fwd_x_chunks = []
+    fwd_y_chunks = []
+    rev_x_chunks = []
+    rev_y_chunks = []
+
+    # 线段先收集到列表，最后一次性创建LineCollection，
+    # 避免每条匹配线段各生成一个Line2D艺术家对象
+    fwd_segs = []
+    rev_segs = []
+
+    # 反向互补序列只计算一次，避免在循环内反复重建
+    query_rev = reverse_complement(query)
+
+    # 预先计算每个重复序列在query/query_rev中的首个匹配位置，
+    # 避免在位置循环内对同一序列反复调用find；
+    # 检测阶段已给出query位置的结果直接复用，不再重新扫描
+    q_pos_map = {}
+    for repeat in repeats:
+        key = (repeat['sequence'], repeat['reversed'])
+        if key in q_pos_map:
+            continue
+        if 'query_positions' in repeat and repeat['query_positions']:
+            q_pos_map[key] = repeat['query_positions'][0]
+        else:
+            q_pos_map[key] = (query_rev if repeat['reversed'] else query).find(repeat['sequence'])
+
+    # 新格式结果先展开为(ref位置, query位置)对的结构化数组（SoA），
+    # 线段端点和散点坐标整体向量化计算，不再逐结果取字典字段；
+    # 旧格式结果仍走逐条循环的兼容分支
+    new_rows = []
+    legacy_repeats = []
     for repeat in repeats:
-        seq_len = len(repeat['sequence'])
-        
-        # 检查是否有新格式的重复结果（包含ref_positions和query_positions）
         if 'ref_positions' in repeat and 'query_positions' in repeat:
-            # 新格式的重复结果
+            seq_len = len(repeat['sequence'])
             for ref_pos in repeat['ref_positions']:
                 for query_pos in repeat['query_positions']:
-                    if repeat['reversed']:
-                        # 反向重复 - 绿色
-                        if seq_len > 10:  # 增加长度阈值，减少线段数量
-                            ax.plot([ref_pos, ref_pos + seq_len - 1], [query_pos, query_pos + seq_len - 1], 'g-', linewidth=line_width, alpha=alpha)
-                        # 对于较短的序列，只添加端点，减少点的数量
-                        if seq_len <= 10 or seq_len > 20:
-                            reverse_x.append(ref_pos)
-                            reverse_y.append(query_pos)
-                            reverse_x.append(ref_pos + seq_len - 1)
-                            reverse_y.append(query_pos + seq_len - 1)
-                        else:
-                            # 对于中等长度的序列，添加更多点以保持可见性
-                            for i in range(0, seq_len, 2):  # 每隔2个碱基添加一个点
-                                reverse_x.append(ref_pos + i)
-                                reverse_y.append(query_pos + i)
-                    else:
-                        # 正向重复 - 红色
-                        if seq_len > 10:  # 增加长度阈值，减少线段数量
-                            ax.plot([ref_pos, ref_pos + seq_len - 1], [query_pos, query_pos + seq_len - 1], 'r-', linewidth=line_width, alpha=alpha)
-                        # 对于较短的序列，只添加端点，减少点的数量
-                        if seq_len <= 10 or seq_len > 20:
-                            forward_x.append(ref_pos)
-                            forward_y.append(query_pos)
-                            forward_x.append(ref_pos + seq_len - 1)
-                            forward_y.append(query_pos + seq_len - 1)
-                        else:
-                            # 对于中等长度的序列，添加更多点以保持可见性
-                            for i in range(0, seq_len, 2):  # 每隔2个碱基添加一个点
-                                forward_x.append(ref_pos + i)
-                                forward_y.append(query_pos + i)
-                    
-                    # 在图上标注重复次数，但只为较长的序列添加标注，避免过度绘制
-                    if 'repeat_count' in repeat and repeat['repeat_count'] > 0 and seq_len > 15:
-                        ax.text(ref_pos + seq_len/2, query_pos - 5, f"重复{repeat['repeat_count']}次", 
-                                fontsize=8, ha='center', va='bottom', 
-                                color='green' if repeat['reversed'] else 'red')
+                    new_rows.append((ref_pos, query_pos, seq_len,
+                                     repeat.get('repeat_count', 0), repeat['reversed']))
         else:
-            # 旧格式的重复结果（兼容性保留）
-            for pos in repeat.get('positions', []):
-                if repeat['reversed']:
-                    # 反向互补匹配 - 绿色
-                    # 对于反向互补，我们需要找到query中的对应位置
-                    query_rev = reverse_complement(query)
-                    subseq = repeat['sequence']
-                    q_pos = query_rev.find(subseq)
-                    if q_pos != -1:
-                        # 只为较长的匹配添加线段，减少过度绘制
-                        if seq_len > 10:  # 增加长度阈值，减少线段数量
-                            # 添加线段
-                            ax.plot([pos, pos + seq_len - 1], [q_pos, q_pos + seq_len - 1], 'g-', linewidth=line_width, alpha=alpha)
-                        # 对于较短的序列，只添加端点，减少点的数量
-                        if seq_len <= 10 or seq_len > 20:
-                            reverse_x.append(pos)
-                            reverse_y.append(q_pos)
-                            reverse_x.append(pos + seq_len - 1)
-                            reverse_y.append(q_pos + seq_len - 1)
-                        else:
-                            # 对于中等长度的序列，添加更多点以保持可见性
-                            for i in range(0, seq_len, 2):  # 每隔2个碱基添加一个点
-                                reverse_x.append(pos + i)
-                                reverse_y.append(q_pos + i)
-                else:
-                    # 正向匹配 - 红色
-                    # 找到query中的对应位置
-                    subseq = repeat['sequence']
-                    q_pos = query.find(subseq)
-                    if q_pos != -1:
-                        # 只为较长的匹配添加线段，减少过度绘制
-                        if seq_len > 10:  # 增加长度阈值，减少线段数量
-                            # 添加线段
-                            ax.plot([pos, pos + seq_len - 1], [q_pos, q_pos + seq_len - 1], 'r-', linewidth=line_width, alpha=alpha)
-                        # 对于较短的序列，只添加端点，减少点的数量
-                        if seq_len <= 10 or seq_len > 20:
-                            forward_x.append(pos)
-                            forward_y.append(q_pos)
-                            forward_x.append(pos + seq_len - 1)
-                            forward_y.append(q_pos + seq_len - 1)
-                        else:
-                            # 对于中等长度的序列，添加更多点以保持可见性
-                            for i in range(0, seq_len, 2):  # 每隔2个碱基添加一个点
-                                forward_x.append(pos + i)
-                                forward_y.append(q_pos + i)
+            legacy_repeats.append(repeat)
+    results_arr = np.array(new_rows, dtype=_RES_DTYPE)
+
+    for is_rev, segs, x_chunks, y_chunks in (
+            (False, fwd_segs, fwd_x_chunks, fwd_y_chunks),
+            (True, rev_segs, rev_x_chunks, rev_y_chunks)):
+        cls = results_arr[results_arr['reversed'] == is_rev]
+        if cls.shape[0] == 0:
+            continue
+        ref_pos = cls['ref_pos'].astype(np.int64)
+        query_pos = cls['query_pos'].astype(np.int64)
+        seq_lens = cls['length'].astype(np.int64)
+
+        # 长度>10的结果堆成(N,2,2)端点数组一次性加入线段列表
+        seg_mask = seq_lens > 10
+        if seg_mask.any():
+            x0 = ref_pos[seg_mask]
+            y0 = query_pos[seg_mask]
+            ext = seq_lens[seg_mask] - 1
+            segs.extend(np.stack([np.stack([x0, y0], axis=1),
+                                  np.stack([x0 + ext, y0 + ext], axis=1)], axis=1))
+
+        # 对于较短和超长的序列，只添加首尾端点，减少点的数量
+        end_mask = (seq_lens <= 10) | (seq_lens > 20)
+        ext = seq_lens[end_mask] - 1
+        x_chunks.append(ref_pos[end_mask])
+        y_chunks.append(query_pos[end_mask])
+        x_chunks.append(ref_pos[end_mask] + ext)
+        y_chunks.append(query_pos[end_mask] + ext)
+
+        # 中等长度每隔2个碱基一个点：repeat+cumsum展开变长偏移，
+        # 无需对每个结果跑一遍Python内层循环
+        mid_mask = ~end_mask
+        if mid_mask.any():
+            counts = (seq_lens[mid_mask] + 1) // 2
+            offsets = (np.arange(int(counts.sum()))
+                       - np.repeat(np.cumsum(counts) - counts, counts)) * 2
+            x_chunks.append(np.repeat(ref_pos[mid_mask], counts) + offsets)
+            y_chunks.append(np.repeat(query_pos[mid_mask], counts) + offsets)
+
+    # 在图上标注重复次数，但只为较长的序列添加标注，避免过度绘制
+    if results_arr.shape[0]:
+        for row in results_arr[(results_arr['repeat_count'] > 0) & (results_arr['length'] > 15)]:
+            ax.text(row['ref_pos'] + row['length'] / 2, row['query_pos'] - 5, f"重复{row['repeat_count']}次",
+                    fontsize=8, ha='center', va='bottom',
+                    color='green' if row['reversed'] else 'red')
+
+    # 收集旧格式结果的坐标（兼容性保留）
+    for repeat in legacy_repeats:
+        seq_len = len(repeat['sequence'])
+        for pos in repeat.get('positions', []):
+            if repeat['reversed']:
+                # 反向互补匹配 - 绿色
+                # 对于反向互补，我们需要找到query中的对应位置
+                subseq = repeat['sequence']
+                q_pos = q_pos_map[(subseq, True)]
+                if q_pos != -1:
+                    # 只为较长的匹配添加线段，减少过度绘制
+                    if seq_len > 10:  # 增加长度阈值，减少线段数量
+                        # 添加线段
+                        rev_segs.append([(pos, q_pos), (pos + seq_len - 1, q_pos + seq_len - 1)])
+                    # 对于较短的序列，只添加端点，减少点的数量
+                    if seq_len <= 10 or seq_len > 20:
+                        idx = np.array([0, seq_len - 1], dtype=np.int32)
+                    else:
+                        # 对于中等长度的序列，添加更多点以保持可见性（每隔2个碱基一个点）
+                        idx = np.arange(0, seq_len, 2, dtype=np.int32)
+                    rev_x_chunks.append(pos + idx)
+                    rev_y_chunks.append(q_pos + idx)
+            else:
+                # 正向匹配 - 红色
+                # 找到query中的对应位置
+                subseq = repeat['sequence']
+                q_pos = q_pos_map[(subseq, False)]
+                if q_pos != -1:
+                    # 只为较长的匹配添加线段，减少过度绘制
+                    if seq_len > 10:  # 增加长度阈值，减少线段数量
+                        # 添加线段
+                        fwd_segs.append([(pos, q_pos), (pos + seq_len - 1, q_pos + seq_len - 1)])
+                    # 对于较短的序列，只添加端点，减少点的数量
+                    if seq_len <= 10 or seq_len > 20:
+                        idx = np.array([0, seq_len - 1], dtype=np.int32)
+                    else:
+                        # 对于中等长度的序列，添加更多点以保持可见性（每隔2个碱基一个点）
+                        idx = np.arange(0, seq_len, 2, dtype=np.int32)
+                    fwd_x_chunks.append(pos + idx)
+                    fwd_y_chunks.append(q_pos + idx)
     
+    # 将所有线段一次性加入两个LineCollection，整体只占两个艺术家对象
+    from matplotlib.collections import LineCollection
+    fwd_lines = LineCollection(fwd_segs, colors='red', linewidths=line_width, alpha=alpha)
+    rev_lines = LineCollection(rev_segs, colors='green', linewidths=line_width, alpha=alpha)
+    ax.add_collection(fwd_lines)
+    ax.add_collection(rev_lines)
+
+    # 在C层拼接所有坐标块
+    forward_x = np.concatenate(fwd_x_chunks) if fwd_x_chunks else np.empty(0, np.int32)
+    forward_y = np.concatenate(fwd_y_chunks) if fwd_y_chunks else np.empty(0, np.int32)
+    reverse_x = np.concatenate(rev_x_chunks) if rev_x_chunks else np.empty(0, np.int32)
+    reverse_y = np.concatenate(rev_y_chunks) if rev_y_chunks else np.empty(0, np.int32)
+
     # 绘制正向匹配点（红色）
     forward_scatter = ax.scatter(forward_x, forward_y, color='red', s=point_size, alpha=alpha, label='Forward')
     # 绘制反向互补匹配点（绿色）
     reverse_scatter = ax.scatter(reverse_x, reverse_y, color='green', s=point_size, alpha=alpha, label='Reverse')
-    
+
     # 设置单选按钮UI - 移动到左上角，避免与图形重叠
     from matplotlib.widgets import RadioButtons
     rax = plt.axes([0.02, 0.85, 0.15, 0.15], facecolor='lightgoldenrodyellow')
@@ -453,24 +974,13 @@ def visualize_matches(reference, query, repeats, figsize=(12, 10), alpha=0.5, po
     legend_ax.text(0.2, 0.3, 'Reverse', verticalalignment='center')
     
     def update_visibility(label):
-        # 更新线段和点的可见性
-        if label == 'Both':
-            for line in ax.lines:
-                line.set_visible(True)
-            for dot in ax.collections:
-                dot.set_visible(True)
-        elif label == 'Forward':
-            # 显示正向匹配（红色）
-            for i, line in enumerate(ax.lines):
-                line.set_visible('r-' in str(line.get_color()))
-            ax.collections[0].set_visible(True)
-            ax.collections[1].set_visible(False)
-        elif label == 'Reverse':
-            # 显示反向互补匹配（绿色）
-            for i, line in enumerate(ax.lines):
-                line.set_visible('g-' in str(line.get_color()))
-            ax.collections[0].set_visible(False)
-            ax.collections[1].set_visible(True)
+        # 直接切换两组集合的可见性，无需遍历所有线段
+        show_fwd = label in ('Both', 'Forward')
+        show_rev = label in ('Both', 'Reverse')
+        fwd_lines.set_visible(show_fwd)
+        forward_scatter.set_visible(show_fwd)
+        rev_lines.set_visible(show_rev)
+        reverse_scatter.set_visible(show_rev)
         fig.canvas.draw_idle()
     
     radio.on_clicked(update_visibility)
@@ -507,25 +1017,24 @@ def main(max_output=None):
     output_file = open("hash_dp_results.txt", "w", encoding="utf-8")
     
     try:
-        with open(file_path, 'r') as file:
+        with open(file_path, 'rb') as file:
             content = file.read()
-            
-            # 解析文件内容
-            ref_start = content.find("ref:")
-            query_start = content.find("query:")
-            
+
+            # 解析文件内容：字节层定位标记并剔除空白，
+            # 全程只做一次upper和一次解码，避免多趟字符串拷贝
+            ref_start = content.find(b"ref:")
+            query_start = content.find(b"query:")
+
             if ref_start == -1 or query_start == -1:
                 print_and_write(output_file, "文件格式错误，无法找到reference或query序列标记")
                 return
-            
+
             # 提取reference序列
-            ref_content = content[ref_start + 4:query_start].strip()
-            reference = ref_content.strip().upper()
-            
+            reference = content[ref_start + 4:query_start].translate(None, b" \t\r\n").upper().decode('ascii')
+
             # 提取query序列
-            query_content = content[query_start + 6:].strip()
-            query = query_content.strip().upper()
-            
+            query = content[query_start + 6:].translate(None, b" \t\r\n").upper().decode('ascii')
+
             print_and_write(output_file, f"已从文件 {file_path} 读取序列：")
             print_and_write(output_file, f"Reference序列长度: {len(reference)}")
             print_and_write(output_file, f"Query序列长度: {len(query)}")